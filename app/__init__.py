@@ -5,9 +5,12 @@ from flask_migrate import Migrate
 from flask_cors import CORS  # Add this import
 from config import Config
 from flask_mail import Mail
+from werkzeug.middleware.proxy_fix import ProxyFix
+from app.tenancy import TenantRoutingSession, init_tenancy
 import logging
+import time
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': TenantRoutingSession})
 jwt = JWTManager()
 migrate = Migrate()
 mail = Mail()
@@ -16,12 +19,17 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    # Client IPs (rate limits) come from X-Forwarded-For set by trusted proxies only
+    hops = app.config.get('TRUSTED_PROXY_HOPS', 0)
+    if hops:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops, x_host=hops)
+
     # Enable CORS for all routes
     CORS(app, resources={
         r"/*": {
             "origins": "*",  # Allow all origins
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],  # Allow all methods
-            "allow_headers": ["Content-Type", "Authorization"]  # Allow these headers
+            "allow_headers": ["Content-Type", "Authorization", "Idempotency-Key", "X-Organization"]  # Allow these headers
         }
     })
 
@@ -31,7 +39,7 @@ def create_app(config_class=Config):
 
     # Initialize extensions
     db.init_app(app)
-    migrate.init_app(app)
+    migrate.init_app(app, db)
     jwt.init_app(app)
     mail.init_app(app)
 
@@ -50,13 +58,53 @@ def create_app(config_class=Config):
     def expired_token_callback(jwt_header, jwt_payload):
         return jsonify({'error': 'Token has expired'}), 401
 
+    @jwt.additional_claims_loader
+    def add_issued_at_claim(identity):
+        # Sub-second issue time, compared against user-wide revocations
+        return {'iat_us': time.time_ns() // 1000}
+
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(jwt_header, jwt_payload):
+        from app.utils.blocklist import revocation_cache
+        return revocation_cache.is_revoked(jwt_payload)
+
+    @jwt.revoked_token_loader
+    def revoked_token_callback(jwt_header, jwt_payload):
+        return jsonify({'error': 'Token has been revoked'}), 401
+
+    # Organization scoping must run before any blueprint's own hooks
+    init_tenancy(app)
+
     # Register blueprints
     from app.routes.auth import auth_bp
     from app.routes.admin import admin_bp
     from app.routes.employee import employee_bp
+    from app.routes.health import health_bp
+    from app.routes.batch import batch_bp
 
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(employee_bp, url_prefix='/employee')
+    app.register_blueprint(health_bp)
+    app.register_blueprint(batch_bp)
+
+    from app.cli import register_commands
+    register_commands(app)
+
+    # Statement counting per request (development and tests only)
+    from app.utils.query_budget import init_query_budget
+    init_query_budget(app)
+
+    # Keep employee summary rows in step with every ORM write
+    from app.utils.projection import init_projection
+    init_projection()
+
+    # Broadcast cache invalidations to the other workers after commit
+    from app.utils.invalidation import init_invalidation
+    init_invalidation(app)
+
+    # Record deletions for ?since= delta sync
+    from app.utils.sync import init_sync
+    init_sync()
 
     return app
\ No newline at end of file
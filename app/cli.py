@@ -0,0 +1,160 @@
+# app/cli.py
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app.tenancy import tenant_database_keys, using_database
+
+
+def _each_database():
+    """Yield a label per tenant database with the session routed to it."""
+    for bind_key in tenant_database_keys():
+        with using_database(bind_key):
+            yield bind_key or 'default'
+
+ledger_cli = AppGroup('ledger', help='Leave ledger maintenance.')
+
+
+@ledger_cli.command('compact')
+def compact_command():
+    """Fold uncompacted ledger entries into balance snapshots."""
+    from app.utils.ledger import compact_ledger
+    for database in _each_database():
+        touched = compact_ledger()
+        click.echo(f'[{database}] Compacted ledger into {touched} balance snapshots')
+
+
+@ledger_cli.command('accrue')
+@click.option('--note', default=None, help='Note stored on every accrual entry.')
+def accrue_command(note):
+    """Credit each approved employee with the default allocation of every balance-tracked type."""
+    from app.utils.ledger import accrue_default_allocations
+    for database in _each_database():
+        created = accrue_default_allocations(note)
+        click.echo(f'[{database}] Appended {created} accrual entries')
+
+
+idempotency_cli = AppGroup('idempotency', help='Idempotency key maintenance.')
+
+
+@idempotency_cli.command('purge')
+def purge_command():
+    """Delete expired Idempotency-Key records (run from cron)."""
+    from app.utils.idempotency import purge_expired_keys
+    for database in _each_database():
+        deleted = purge_expired_keys()
+        click.echo(f'[{database}] Deleted {deleted} expired idempotency keys')
+
+
+capacity_cli = AppGroup('capacity', help='Team capacity counters.')
+
+
+@capacity_cli.command('rebuild')
+def rebuild_capacity_command():
+    """Recompute per-day absence counters from approved leave requests."""
+    from app import db
+    from app.models.models import Organization
+    from app.utils.capacity import rebuild_counts
+
+    for database in _each_database():
+        for (organization_id,) in db.session.query(Organization.id).all():
+            rebuild_counts(organization_id)
+        click.echo(f'[{database}] Rebuilt capacity counters')
+
+
+outbox_cli = AppGroup('outbox', help='Queued outgoing email.')
+
+
+@outbox_cli.command('send')
+def send_outbox_command():
+    """Send queued emails in batches."""
+    from app.utils.outbox import send_queued_emails
+    for database in _each_database():
+        sent = send_queued_emails()
+        click.echo(f'[{database}] Sent {sent} queued emails')
+
+
+sync_cli = AppGroup('sync', help='Delta-sync bookkeeping.')
+
+
+@sync_cli.command('purge-tombstones')
+def purge_tombstones_command():
+    """Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS."""
+    from app.utils.sync import purge_tombstones
+    for database in _each_database():
+        deleted = purge_tombstones()
+        click.echo(f'[{database}] Deleted {deleted} tombstones')
+
+
+partitions_cli = AppGroup('partitions', help='Partition maintenance for leave requests and notifications.')
+
+
+@partitions_cli.command('maintain')
+@click.option('--archive-schema', default=None,
+              help='Move retired partitions into this schema (default PARTITION_ARCHIVE_SCHEMA).')
+def maintain_partitions_command(archive_schema):
+    """Create upcoming partitions and retire those past their retention period.
+
+    Run at least once per period (monthly, for notifications). Rows written
+    while a period had no partition land in the default partition; the next
+    run moves them into the new partition, holding an exclusive lock on the
+    table while it does.
+    """
+    from app.utils.partitions import PARTITIONED_TABLES, create_future_partitions, retire_old_partitions
+
+    ahead = current_app.config['PARTITION_PRECREATE']
+    retention = current_app.config['PARTITION_RETENTION']
+    archive_schema = archive_schema or current_app.config.get('PARTITION_ARCHIVE_SCHEMA')
+
+    for database in _each_database():
+        for table in PARTITIONED_TABLES:
+            for name, moved in create_future_partitions(table, ahead[table]):
+                click.echo(f'[{database}] Created partition {name}'
+                           + (f', moved {moved} rows from the default partition' if moved else ''))
+            if retention.get(table):
+                for name in retire_old_partitions(table, retention[table], archive_schema):
+                    click.echo(f'[{database}] Retired partition {name}')
+
+
+digest_cli = AppGroup('digest', help='Admin digest emails.')
+
+
+@digest_cli.command('send')
+def send_digest_command():
+    """Email each digest admin a summary of activity since their last digest."""
+    from app.utils.digest import send_admin_digests
+    for database in _each_database():
+        sent = send_admin_digests()
+        click.echo(f'[{database}] Sent {sent} digest emails')
+
+
+organizations_cli = AppGroup('organizations', help='Manage organizations (tenants).')
+
+
+@organizations_cli.command('create')
+@click.argument('name')
+@click.argument('slug')
+@click.option('--database-key', default=None,
+              help='SQLALCHEMY_BINDS key of a dedicated database for this organization.')
+def create_organization_command(name, slug, database_key):
+    """Register a new organization."""
+    from app import db
+    from app.models.models import Organization
+
+    if database_key and database_key not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        raise click.BadParameter(f'Unknown bind key: {database_key}', param_hint='--database-key')
+
+    organization = Organization(name=name, slug=slug, database_key=database_key)
+    db.session.add(organization)
+    db.session.commit()
+    click.echo(f'Created organization {organization.id} ({organization.slug})')
+
+
+def register_commands(app):
+    app.cli.add_command(ledger_cli)
+    app.cli.add_command(idempotency_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(digest_cli)
+    app.cli.add_command(organizations_cli)
+    app.cli.add_command(sync_cli)
+    app.cli.add_command(outbox_cli)
+    app.cli.add_command(capacity_cli)
@@ -1,2 +1,6 @@
 # app/models/__init__.py
-from app.models.models import User, LeaveType, LeaveRequest, LeaveBalance, Notification
+from app.models.models import (
+    Organization, User, LeaveType, LeaveRequest, LeaveBalance, LeaveLedgerEntry, Notification,
+    TokenBlocklist, IdempotencyKey, NotificationPreference, EmployeeSummary, Tombstone,
+    OutboxEmail, LeaveBlackout, CapacityLimit, LeaveDayCount
+)
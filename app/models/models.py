@@ -3,21 +3,60 @@ from datetime import datetime
 from app import db
 from werkzeug.security import generate_password_hash, check_password_hash
 
+class Organization(db.Model):
+    __tablename__ = 'organizations'
+    # Directory table: always read from the default database (see app.tenancy)
+    __global_bind__ = True
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    name = db.Column(db.String, nullable=False)
+    slug = db.Column(db.String, unique=True, nullable=False)
+    # SQLALCHEMY_BINDS key of a dedicated database; NULL shares the default one
+    database_key = db.Column(db.String)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'slug': self.slug,
+            'database_key': self.database_key,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
 class User(db.Model):
     __tablename__ = 'users'
     
     id = db.Column(db.BigInteger, primary_key=True)
-    username = db.Column(db.String, unique=True, nullable=False)
+    organization_id = db.Column(db.BigInteger, db.ForeignKey('organizations.id'), nullable=False)
+    username = db.Column(db.String, nullable=False)
     password_hash = db.Column(db.String, nullable=False)
-    email = db.Column(db.String, unique=True, nullable=False)
+    email = db.Column(db.String, nullable=False)
     role = db.Column(db.String, nullable=False)
     is_approved = db.Column(db.Boolean, default=False, nullable=False)
+    # Free-form team name used by capacity limits and blackouts
+    team = db.Column(db.String)
     created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
     
-    leave_requests = db.relationship('LeaveRequest', backref='user', lazy=True)
+    leave_requests = db.relationship('LeaveRequest', backref='user', lazy=True,
+                                     foreign_keys='LeaveRequest.user_id')
     leave_balances = db.relationship('LeaveBalance', backref='user', lazy=True)
     notifications = db.relationship('Notification', backref='user', lazy=True)
 
+    __table_args__ = (
+        # Usernames and emails only have to be unique within an organization
+        db.UniqueConstraint('organization_id', 'username', name='uq_users_organization_username'),
+        db.UniqueConstraint('organization_id', 'email', name='uq_users_organization_email'),
+        # Login without X-Organization looks the username up in every organization
+        db.Index('ix_users_username', 'username'),
+        # Case-insensitive prefix search on employee name
+        db.Index('ix_users_username_lower_pattern', db.text('lower(username) text_pattern_ops')),
+        # Keeps the pending-approval count on the dashboard an index-only scan
+        db.Index('ix_users_pending_approval', 'id', postgresql_where=db.text('NOT is_approved')),
+        db.Index('ix_users_organization_role', 'organization_id', 'role'),
+        db.Index('ix_users_organization_team', 'organization_id', 'team'),
+    )
+
     def set_password(self, password):
         self.password_hash = generate_password_hash(password)
 
@@ -31,6 +70,7 @@ class User(db.Model):
             'email': self.email,
             'role': self.role,
             'is_approved': self.is_approved,
+            'team': self.team,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
@@ -38,6 +78,7 @@ class LeaveType(db.Model):
     __tablename__ = 'leavetypes'
     
     id = db.Column(db.BigInteger, primary_key=True)
+    organization_id = db.Column(db.BigInteger, db.ForeignKey('organizations.id'), nullable=False)
     name = db.Column(db.String, nullable=False)
     description = db.Column(db.String)
     default_allocation = db.Column(db.Integer)  # New field
@@ -47,6 +88,10 @@ class LeaveType(db.Model):
     leave_requests = db.relationship('LeaveRequest', backref='leave_type', lazy=True)
     leave_balances = db.relationship('LeaveBalance', backref='leave_type', lazy=True)
 
+    __table_args__ = (
+        db.UniqueConstraint('organization_id', 'name', name='uq_leavetypes_organization_name'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -60,15 +105,45 @@ class LeaveType(db.Model):
 class LeaveRequest(db.Model):
     __tablename__ = 'leaverequests'
     
-    id = db.Column(db.BigInteger, primary_key=True)
+    # Range-partitioned yearly on created_at, so the partition key is part of
+    # the table's primary key; the mapper still identifies rows by id alone.
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
+    organization_id = db.Column(db.BigInteger, db.ForeignKey('organizations.id'), nullable=False)
     user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
     leave_type_id = db.Column(db.BigInteger, db.ForeignKey('leavetypes.id'), nullable=False)
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
     status = db.Column(db.String, nullable=False)
     reason = db.Column(db.String)
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
-    updated_at = db.Column(db.DateTime(timezone=True), onupdate=datetime.utcnow)
+    # Requester's team when submitted; capacity counters are kept under it
+    team = db.Column(db.String)
+    created_at = db.Column(db.DateTime(timezone=True), primary_key=True, default=datetime.utcnow, nullable=False)
+    # Maintained on every ORM insert and update; drives ?since= delta sync
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow,
+                           nullable=False)
+    # Work-queue lease held by an approver (see /admin/leave-requests/claim)
+    claimed_by = db.Column(db.BigInteger, db.ForeignKey('users.id'))
+    claimed_until = db.Column(db.DateTime(timezone=True))
+
+    # Expression indexes backing /admin/leave-requests/search
+    __table_args__ = (
+        db.Index('ix_leaverequests_reason_tsv',
+                 db.text("to_tsvector('english', coalesce(reason, ''))"),
+                 postgresql_using='gin'),
+        db.Index('ix_leaverequests_date_range',
+                 db.text("daterange(start_date, end_date, '[]')"),
+                 postgresql_using='gist'),
+        db.Index('ix_leaverequests_status_type_start', 'status', 'leave_type_id', 'start_date'),
+        # Oldest-first scan of the pending queue
+        db.Index('ix_leaverequests_pending_queue', 'created_at', 'id',
+                 postgresql_where=db.text("status = 'pending'")),
+        # Per-user and per-organization change feeds (?since=)
+        db.Index('ix_leaverequests_user_updated', 'user_id', 'updated_at'),
+        db.Index('ix_leaverequests_organization_updated', 'organization_id', 'updated_at'),
+        db.Index('ix_leaverequests_organization_status_created', 'organization_id', 'status', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+    __mapper_args__ = {'primary_key': [id]}
 
     def to_dict(self):
         return {
@@ -80,7 +155,8 @@ class LeaveRequest(db.Model):
             'end_date': self.end_date.strftime('%Y-%m-%d'),
             'status': self.status,
             'reason': self.reason,
-            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S') if self.updated_at else None
         }
 
 class LeaveBalance(db.Model):
@@ -89,9 +165,14 @@ class LeaveBalance(db.Model):
     id = db.Column(db.BigInteger, primary_key=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
     leave_type_id = db.Column(db.BigInteger, db.ForeignKey('leavetypes.id'), nullable=False)
+    # Compacted snapshot; the live balance adds uncompacted LeaveLedgerEntry deltas
     balance = db.Column(db.Integer, nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'leave_type_id', name='uq_leavebalances_user_type'),
+    )
+
     def to_dict(self):
         return {
             'id': self.id,
@@ -102,14 +183,58 @@ class LeaveBalance(db.Model):
             'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
+class LeaveLedgerEntry(db.Model):
+    __tablename__ = 'leaveledger'
+
+    KINDS = ('accrual', 'approval', 'adjustment', 'reversal')
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
+    leave_type_id = db.Column(db.BigInteger, db.ForeignKey('leavetypes.id'), nullable=False)
+    # No FK: leaverequests is partitioned and its primary key includes created_at
+    leave_request_id = db.Column(db.BigInteger, index=True)
+    kind = db.Column(db.String, nullable=False)
+    delta = db.Column(db.Integer, nullable=False)
+    note = db.Column(db.String)
+    created_by = db.Column(db.BigInteger, db.ForeignKey('users.id'))
+    # Set once the delta has been folded into the LeaveBalance snapshot
+    compacted = db.Column(db.Boolean, default=False, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_leaveledger_user_type_pending', 'user_id', 'leave_type_id',
+                 postgresql_where=db.text('NOT compacted')),
+        db.Index('ix_leaveledger_user_type_created', 'user_id', 'leave_type_id', 'created_at'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'user_id': self.user_id,
+            'leave_type_id': self.leave_type_id,
+            'leave_request_id': self.leave_request_id,
+            'kind': self.kind,
+            'delta': self.delta,
+            'note': self.note,
+            'created_by': self.created_by,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
 class Notification(db.Model):
     __tablename__ = 'notifications'
     
-    id = db.Column(db.BigInteger, primary_key=True)
+    # Range-partitioned monthly on created_at (see LeaveRequest)
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=True)
     user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
     message = db.Column(db.String, nullable=False)
     is_read = db.Column(db.Boolean, default=False, nullable=False)
-    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), primary_key=True, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_notifications_user_unread', 'user_id', postgresql_where=db.text('NOT is_read')),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
+    __mapper_args__ = {'primary_key': [id]}
 
     def to_dict(self):
         return {
@@ -118,4 +243,202 @@ class Notification(db.Model):
             'message': self.message,
             'is_read': self.is_read,
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
-        }
\ No newline at end of file
+        }
+
+class TokenBlocklist(db.Model):
+    __tablename__ = 'tokenblocklist'
+    # Checked before the tenant is known, so it lives with the directory
+    __global_bind__ = True
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    # NULL jti revokes every token issued to the user before created_at
+    jti = db.Column(db.String(36), unique=True)
+    # No FK to users: an organization's users may live in its own database
+    user_id = db.Column(db.BigInteger, nullable=False, index=True)
+    organization_id = db.Column(db.BigInteger, db.ForeignKey('organizations.id'))
+    token_type = db.Column(db.String, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'jti': self.jti,
+            'user_id': self.user_id,
+            'token_type': self.token_type,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'expires_at': self.expires_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+class IdempotencyKey(db.Model):
+    __tablename__ = 'idempotencykeys'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    method = db.Column(db.String(10), nullable=False)
+    path = db.Column(db.String, nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)
+    # NULL until the first attempt finishes
+    status_code = db.Column(db.Integer)
+    response_body = db.Column(db.JSON)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime(timezone=True), nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotencykeys_user_key'),
+    )
+
+
+class NotificationPreference(db.Model):
+    __tablename__ = 'notificationpreferences'
+
+    EMAIL_MODES = ('instant', 'digest', 'off')
+
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), primary_key=True)
+    # Users without a row get the daily digest
+    email_mode = db.Column(db.String, default='digest', nullable=False)
+    last_digest_at = db.Column(db.DateTime(timezone=True))
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'email_mode': self.email_mode,
+            'last_digest_at': self.last_digest_at.strftime('%Y-%m-%d %H:%M:%S') if self.last_digest_at else None
+        }
+
+
+class EmployeeSummary(db.Model):
+    """Read model for the employee home screen, kept current by app.utils.projection."""
+    __tablename__ = 'employeesummaries'
+
+    user_id = db.Column(db.BigInteger, db.ForeignKey('users.id'), primary_key=True)
+    balances = db.Column(db.JSON, nullable=False, default=list)
+    pending_count = db.Column(db.Integer, nullable=False, default=0)
+    next_leave = db.Column(db.JSON)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'balances': self.balances,
+            'pending_count': self.pending_count,
+            'next_leave': self.next_leave,
+            'unread_count': self.unread_count,
+            'updated_at': self.updated_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+class Tombstone(db.Model):
+    """Deleted rows, so delta-sync clients (?since=) learn to drop them too."""
+    __tablename__ = 'tombstones'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    table_name = db.Column(db.String, nullable=False)
+    row_id = db.Column(db.BigInteger, nullable=False)
+    organization_id = db.Column(db.BigInteger, db.ForeignKey('organizations.id'))
+    # No FK: the owner may be deleted as well
+    user_id = db.Column(db.BigInteger)
+    deleted_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_tombstones_table_user_deleted', 'table_name', 'user_id', 'deleted_at'),
+        db.Index('ix_tombstones_table_organization_deleted', 'table_name', 'organization_id', 'deleted_at'),
+    )
+
+
+class OutboxEmail(db.Model):
+    """Queued email, sent in batches by `flask outbox send` (see app.utils.outbox)."""
+    __tablename__ = 'emailoutbox'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    recipient = db.Column(db.String, nullable=False)
+    subject = db.Column(db.String, nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+    sent_at = db.Column(db.DateTime(timezone=True))
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.String)
+
+    __table_args__ = (
+        # The unsent backlog, oldest first
+        db.Index('ix_emailoutbox_unsent', 'created_at', postgresql_where=db.text('sent_at IS NULL')),
+    )
+
+
+class LeaveBlackout(db.Model):
+    """Dates on which no leave may be requested or approved."""
+    __tablename__ = 'leaveblackouts'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    organization_id = db.Column(db.BigInteger, db.ForeignKey('organizations.id'), nullable=False)
+    # NULL applies to every team / every leave type
+    team = db.Column(db.String)
+    leave_type_id = db.Column(db.BigInteger, db.ForeignKey('leavetypes.id'))
+    start_date = db.Column(db.Date, nullable=False)
+    end_date = db.Column(db.Date, nullable=False)
+    reason = db.Column(db.String)
+    created_by = db.Column(db.BigInteger, db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_leaveblackouts_organization_dates', 'organization_id', 'end_date', 'start_date'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'team': self.team,
+            'leave_type_id': self.leave_type_id,
+            'start_date': self.start_date.strftime('%Y-%m-%d'),
+            'end_date': self.end_date.strftime('%Y-%m-%d'),
+            'reason': self.reason,
+            'created_by': self.created_by,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+class CapacityLimit(db.Model):
+    """Most people of a team (or the whole organization) absent on any one day."""
+    __tablename__ = 'leavecapacitylimits'
+
+    id = db.Column(db.BigInteger, primary_key=True)
+    organization_id = db.Column(db.BigInteger, db.ForeignKey('organizations.id'), nullable=False)
+    # NULL counts everyone in the organization / every leave type
+    team = db.Column(db.String)
+    leave_type_id = db.Column(db.BigInteger, db.ForeignKey('leavetypes.id'))
+    max_absent = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime(timezone=True), default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_leavecapacitylimits_organization_team', 'organization_id', 'team'),
+    )
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'team': self.team,
+            'leave_type_id': self.leave_type_id,
+            'max_absent': self.max_absent,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
+        }
+
+
+class LeaveDayCount(db.Model):
+    """Approved absences per organization, team, leave type and day (see app.utils.capacity)."""
+    __tablename__ = 'leavedaycounts'
+
+    organization_id = db.Column(db.BigInteger, db.ForeignKey('organizations.id'), primary_key=True)
+    # '' for people without a team, so the key has no NULLs
+    team = db.Column(db.String, primary_key=True, default='')
+    leave_type_id = db.Column(db.BigInteger, db.ForeignKey('leavetypes.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    absent = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        # Range scans over days for a whole organization
+        db.Index('ix_leavedaycounts_organization_day', 'organization_id', 'day'),
+    )
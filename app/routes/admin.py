@@ -1,16 +1,39 @@
 # app/routes/admin.py
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required
-from app.models.models import User, LeaveType, LeaveRequest, LeaveBalance
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app.models.models import (
+    User, LeaveType, LeaveRequest, LeaveLedgerEntry, NotificationPreference, LeaveBlackout, CapacityLimit
+)
+from sqlalchemy.orm import contains_eager, joinedload
 from app import db
 from app.utils.decorators import admin_required
+from app.utils.query_budget import query_budget
+from app.utils.sync import CursorExpired, parse_since, next_cursor, deleted_since, leave_request_changes
+from app.tenancy import current_organization_id
 import traceback
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.utils.email import send_email
+from app.utils.bulk_import import parse_import_rows, import_users
+from app.utils.bulk_users import BulkActionError, bulk_user_action
+from app.utils.capacity import CapacityExceeded, book_absence, release_absence, find_blackout, normalize_team
+from app.utils.blocklist import revoke_user_tokens
+from app.utils.dashboard import get_dashboard_summary
+from app.utils.forecast import forecast_balances
+from app.utils.listing import list_users, list_leave_requests
+from app.utils.invalidation import invalidate_after_commit
+from app.utils.idempotency import idempotent
+from app.utils.ledger import append_entry, get_balance, get_balances, lock_balance, request_net_delta
 
 admin_bp = Blueprint('admin', __name__)
 
+
+def _prefix_pattern(value):
+    escaped = value.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f'{escaped}%'
+
+
 @admin_bp.route('/users/pending', methods=['GET'])
+@query_budget(4)
 @jwt_required()
 @admin_required
 def get_pending_users():
@@ -49,6 +72,7 @@ def approve_user(user_id):
             return jsonify({'message': 'User is already approved'}), 400
         
         user.is_approved = True
+        invalidate_after_commit('dashboard', ('admin_dashboard', user.organization_id))
         db.session.commit()
 
          # Send approval email
@@ -74,6 +98,78 @@ def approve_user(user_id):
         print(f"Error in approve_user: {str(e)}")
         return jsonify({'error': 'Internal server error'}), 500
 
+@admin_bp.route('/users/<int:user_id>/revoke-tokens', methods=['POST'])
+@jwt_required()
+@admin_required
+def revoke_tokens(user_id):
+    try:
+        user = User.query.filter_by(id=user_id).first()
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        revoke_user_tokens(user.id, user.organization_id)
+
+        return jsonify({
+            'message': 'All tokens for this user have been revoked',
+            'user_id': user.id
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Error in revoke_tokens: {str(e)}")
+        return jsonify({'error': 'Internal server error'}), 500
+
+@admin_bp.route('/users/import', methods=['POST'])
+@jwt_required()
+@admin_required
+def bulk_import_users():
+    try:
+        rows, options = parse_import_rows(request)
+        if not isinstance(rows, list) or not rows:
+            return jsonify({'error': 'No users to import'}), 400
+
+        report = import_users(rows, options)
+        created = sum(1 for item in report if item['status'] == 'created')
+
+        return jsonify({
+            'message': f'Imported {created} of {len(report)} users',
+            'created': created,
+            'failed': len(report) - created,
+            'results': report
+        }), 201 if created else 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in bulk_import_users: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@admin_bp.route('/users/bulk', methods=['POST'])
+@jwt_required()
+@admin_required
+def bulk_update_users():
+    try:
+        data = request.get_json() or {}
+        results = bulk_user_action(
+            data.get('action'),
+            user_ids=data.get('user_ids'),
+            filters=data.get('filter'),
+            role=data.get('role'),
+            admin_id=int(get_jwt_identity()),
+            notify=data.get('notify', True)
+        )
+        changed = sum(1 for item in results if item['status'] in ('approved', 'rejected', 'updated'))
+
+        return jsonify({
+            'message': f'{changed} users changed',
+            'changed': changed,
+            'results': results
+        }), 200
+    except BulkActionError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in bulk_update_users: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
 @admin_bp.route('/leave-types', methods=['POST'])
 @jwt_required()
 @admin_required
@@ -83,6 +179,10 @@ def create_leave_type():
         
         if 'name' not in data:
             return jsonify({'error': 'Leave type name is required'}), 400
+
+        organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+        if LeaveType.query.filter_by(organization_id=organization_id, name=data['name']).first():
+            return jsonify({'error': 'Leave type already exists'}), 400
             
         leave_type = LeaveType(
             name=data['name'],
@@ -90,6 +190,8 @@ def create_leave_type():
         )
         
         db.session.add(leave_type)
+        db.session.flush()
+        invalidate_after_commit('leave_types', leave_type.organization_id)
         db.session.commit()
         
         return jsonify({
@@ -106,19 +208,23 @@ def create_leave_type():
 @admin_required
 def get_leave_types():
     try:
-        leave_types = LeaveType.query.all()
-        return jsonify([lt.to_dict() for lt in leave_types]), 200
+        organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+        leave_types = current_app.extensions['leave_types'].get_or_set(
+            organization_id,
+            lambda: [lt.to_dict() for lt in LeaveType.query.all()]
+        )
+        return jsonify(leave_types), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
 
 @admin_bp.route('/users', methods=['GET'])
+@query_budget(4)
 @jwt_required()
 @admin_required
 def get_all_users():
     try:
-        users = User.query.all()
-        return jsonify([user.to_dict() for user in users]), 200
+        return jsonify(list_users()), 200
     except Exception as e:
         print(f"Error in get_all_users: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -137,6 +243,7 @@ def update_leave_allocation(type_id):
             return jsonify({'error': 'Cannot modify allocation for this leave type'}), 400
 
         leave_type.default_allocation = data['default_allocation']
+        invalidate_after_commit('leave_types', leave_type.organization_id)
         db.session.commit()
 
         return jsonify({
@@ -156,27 +263,36 @@ def set_leave_balance():
         
         if not all(key in data for key in ['user_id', 'leave_type_id', 'balance']):
             return jsonify({'error': 'Missing required fields'}), 400
+        if not isinstance(data['balance'], int) or isinstance(data['balance'], bool):
+            return jsonify({'error': 'Balance must be a whole number of days'}), 400
+
+        # Ledger rows carry no organization; both ids must belong to this tenant
+        if not User.query.get(data['user_id']):
+            return jsonify({'error': 'User not found'}), 404
+        if not LeaveType.query.get(data['leave_type_id']):
+            return jsonify({'error': 'Leave type not found'}), 404
             
-        balance = LeaveBalance.query.filter_by(
-            user_id=data['user_id'],
-            leave_type_id=data['leave_type_id']
-        ).first()
-        
-        if balance:
-            balance.balance = data['balance']
-        else:
-            balance = LeaveBalance(
-                user_id=data['user_id'],
-                leave_type_id=data['leave_type_id'],
-                balance=data['balance']
+        # Absolute targets are turned into an adjustment against the live balance
+        lock_balance(data['user_id'], data['leave_type_id'])
+        current = get_balance(data['user_id'], data['leave_type_id'])
+        delta = data['balance'] - (current or 0)
+        if delta or current is None:
+            append_entry(
+                data['user_id'],
+                data['leave_type_id'],
+                delta,
+                'adjustment',
+                created_by=int(get_jwt_identity()),
+                note=data.get('note')
             )
-            db.session.add(balance)
-            
         db.session.commit()
+
+        balance = next((b for b in get_balances(data['user_id'])
+                        if b['leave_type_id'] == int(data['leave_type_id'])), None)
         
         return jsonify({
             'message': 'Leave balance set successfully',
-            'balance': balance.to_dict()
+            'balance': balance
         }), 200
     except Exception as e:
         db.session.rollback()
@@ -184,30 +300,233 @@ def set_leave_balance():
     
 
 
+@admin_bp.route('/leave-balance/forecast', methods=['GET'])
+@query_budget(7)
+@jwt_required()
+@admin_required
+def forecast_leave_balances():
+    try:
+        as_of = request.args.get('as_of')
+        try:
+            as_of = datetime.strptime(as_of, '%Y-%m-%d').date() if as_of else datetime.utcnow().date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        flags = ('1', 'true', 'yes')
+        organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+        return jsonify(forecast_balances(
+            organization_id,
+            as_of,
+            include_pending=request.args.get('include_pending', 'true').lower() in flags,
+            shortfall_only=request.args.get('shortfall_only', 'false').lower() in flags
+        )), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/users/<int:user_id>/ledger', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_user_ledger(user_id):
+    try:
+        if not User.query.get(user_id):
+            return jsonify({'error': 'User not found'}), 404
+
+        # Joined through users so the tenant filter applies to the entries too
+        query = LeaveLedgerEntry.query.join(User, User.id == LeaveLedgerEntry.user_id).filter(
+            LeaveLedgerEntry.user_id == user_id
+        )
+        leave_type_id = request.args.get('leave_type_id', type=int)
+        if leave_type_id:
+            query = query.filter(LeaveLedgerEntry.leave_type_id == leave_type_id)
+
+        entries = query.order_by(LeaveLedgerEntry.created_at, LeaveLedgerEntry.id).all()
+        return jsonify({
+            'balances': get_balances(user_id),
+            'entries': [entry.to_dict() for entry in entries]
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/leave-requests', methods=['GET'])
+@query_budget(4)
 @jwt_required()
 @admin_required
 def get_all_leave_requests():
     try:
         status = request.args.get('status')
-        query = LeaveRequest.query
-        
-        if status:
-            query = query.filter_by(status=status)
-            
-        leave_requests = query.all()
-        return jsonify([lr.to_dict() for lr in leave_requests]), 200
+
+        if request.args.get('since'):
+            try:
+                since = parse_since(request.args['since'])
+            except CursorExpired:
+                return jsonify({'error': 'Cursor expired, fetch the full list again'}), 410
+            except ValueError:
+                return jsonify({'error': 'Invalid since cursor'}), 400
+
+            cursor = next_cursor()
+            changed, removed = leave_request_changes(since, status=status)
+            organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+            return jsonify({
+                'leave_requests': changed,
+                'deleted': removed + deleted_since('leaverequests', since, organization_id=organization_id),
+                'cursor': cursor
+            }), 200
+
+        criteria = [LeaveRequest.status == status] if status else []
+        cursor = next_cursor()
+        return jsonify(list_leave_requests(*criteria)), 200, {'X-Sync-Cursor': cursor}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
 
+@admin_bp.route('/leave-requests/search', methods=['GET'])
+@query_budget(5)
+@jwt_required()
+@admin_required
+def search_leave_requests():
+    try:
+        text_query = request.args.get('q', '').strip()
+        employee = request.args.get('employee', '').strip()
+        status = request.args.get('status')
+        leave_type_id = request.args.get('leave_type_id', type=int)
+        page = max(request.args.get('page', 1, type=int), 1)
+        per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+
+        try:
+            date_from = datetime.strptime(request.args['from'], '%Y-%m-%d').date() if request.args.get('from') else None
+            date_to = datetime.strptime(request.args['to'], '%Y-%m-%d').date() if request.args.get('to') else None
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+
+        # Same expressions as the indexes on LeaveRequest / User
+        reason_vector = db.func.to_tsvector('english', db.func.coalesce(LeaveRequest.reason, ''))
+        ts_query = db.func.websearch_to_tsquery('english', text_query)
+        rank = db.func.ts_rank(reason_vector, ts_query) if text_query else db.literal(0.0)
+
+        query = db.session.query(
+            LeaveRequest,
+            User.username,
+            rank.label('rank'),
+            db.func.count().over().label('total')
+        ).join(User, User.id == LeaveRequest.user_id).join(
+            LeaveType, LeaveType.id == LeaveRequest.leave_type_id
+        ).options(contains_eager(LeaveRequest.leave_type))
+
+        if text_query:
+            query = query.filter(db.or_(
+                reason_vector.op('@@')(ts_query),
+                db.func.lower(User.username).like(_prefix_pattern(text_query))
+            ))
+        if employee:
+            query = query.filter(db.func.lower(User.username).like(_prefix_pattern(employee)))
+        if status:
+            query = query.filter(LeaveRequest.status == status)
+        if leave_type_id:
+            query = query.filter(LeaveRequest.leave_type_id == leave_type_id)
+        if date_from or date_to:
+            # Overlap with the requested window, served by the GiST daterange index
+            query = query.filter(
+                db.func.daterange(LeaveRequest.start_date, LeaveRequest.end_date, '[]').op('&&')(
+                    db.func.daterange(date_from, date_to, '[]')
+                )
+            )
+
+        if text_query:
+            query = query.order_by(rank.desc())
+        query = query.order_by(LeaveRequest.created_at.desc(), LeaveRequest.id.desc())
+
+        rows = query.limit(per_page).offset((page - 1) * per_page).all()
+        total = rows[0].total if rows else 0
+
+        results = []
+        for leave_request, username, row_rank, _ in rows:
+            item = leave_request.to_dict()
+            item['username'] = username
+            item['rank'] = round(float(row_rank), 4)
+            results.append(item)
+
+        return jsonify({
+            'results': results,
+            'page': page,
+            'per_page': per_page,
+            'total': total
+        }), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/leave-requests/claim', methods=['POST'])
+@jwt_required()
+@admin_required
+def claim_leave_requests():
+    try:
+        data = request.get_json(silent=True) or {}
+        limit = min(max(int(data.get('limit', 10)), 1), 50)
+        admin_id = int(get_jwt_identity())
+        now = datetime.utcnow()
+        lease_until = now + timedelta(seconds=current_app.config.get('CLAIM_LEASE_SECONDS', 300))
+
+        # Rows another approver is claiming right now are skipped, not waited on
+        next_unclaimed = db.select(LeaveRequest.id).where(
+            LeaveRequest.status == 'pending',
+            db.or_(LeaveRequest.claimed_until.is_(None), LeaveRequest.claimed_until < now)
+        ).order_by(LeaveRequest.created_at, LeaveRequest.id).limit(limit).with_for_update(skip_locked=True)
+
+        claimed_ids = db.session.execute(
+            db.update(LeaveRequest).where(
+                LeaveRequest.id.in_(next_unclaimed.scalar_subquery())
+            ).values(
+                claimed_by=admin_id,
+                claimed_until=lease_until
+            ).returning(LeaveRequest.id).execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.session.commit()
+
+        claimed = LeaveRequest.query.options(joinedload(LeaveRequest.leave_type)).filter(
+            LeaveRequest.id.in_(claimed_ids)
+        ).order_by(LeaveRequest.created_at, LeaveRequest.id).all() if claimed_ids else []
+
+        return jsonify({
+            'claimed_until': lease_until.strftime('%Y-%m-%d %H:%M:%S'),
+            'leave_requests': [lr.to_dict() for lr in claimed]
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/leave-requests/<int:request_id>/release', methods=['POST'])
+@jwt_required()
+@admin_required
+def release_leave_request(request_id):
+    try:
+        released = LeaveRequest.query.filter_by(
+            id=request_id,
+            claimed_by=int(get_jwt_identity())
+        ).update({'claimed_by': None, 'claimed_until': None}, synchronize_session=False)
+        db.session.commit()
+
+        if not released:
+            return jsonify({'error': 'Leave request is not claimed by you'}), 404
+        return jsonify({'message': 'Leave request released'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 
 @admin_bp.route('/leave-requests/<int:request_id>', methods=['PUT'])
 @jwt_required()
 @admin_required
+@idempotent
 def update_leave_request(request_id):
     try:
-        leave_request = LeaveRequest.query.get_or_404(request_id)
+        # Row lock so two approvers deciding the same request are serialised
+        leave_request = LeaveRequest.query.filter_by(id=request_id).with_for_update().first()
+        if not leave_request:
+            return jsonify({'error': 'Leave request not found'}), 404
+
         data = request.get_json()
         
         if 'status' not in data:
@@ -216,22 +535,72 @@ def update_leave_request(request_id):
         if data['status'] not in ['approved', 'rejected']:
             return jsonify({'error': 'Invalid status'}), 400
             
+        admin_id = int(get_jwt_identity())
+        claim_expires = leave_request.claimed_until
+        if (leave_request.claimed_by and leave_request.claimed_by != admin_id
+                and claim_expires and claim_expires > datetime.now(claim_expires.tzinfo)):
+            return jsonify({'error': 'Leave request is claimed by another approver'}), 409
+            
+        # Balance changes are appended to the ledger; approvals never update a shared row
+        booked = request_net_delta(leave_request.id)
+        if data['status'] == 'approved' and booked == 0:
+            # Held until commit, so two approvals for the same user and type
+            # cannot both pass the balance check. Taken before anything is
+            # modified, the same order as set_leave_balance
+            lock_balance(leave_request.user_id, leave_request.leave_type_id)
+
+        was_approved = leave_request.status == 'approved'
         leave_request.status = data['status']
         leave_request.updated_at = datetime.utcnow()
+        leave_request.claimed_by = None
+        leave_request.claimed_until = None
         
-        if data['status'] == 'approved':
-            # Update leave balance
-            balance = LeaveBalance.query.filter_by(
-                user_id=leave_request.user_id,
-                leave_type_id=leave_request.leave_type_id
-            ).first()
+        if data['status'] == 'approved' and booked == 0:
+            balance = get_balance(leave_request.user_id, leave_request.leave_type_id)
             
-            if balance:
+            if balance is not None:
                 days_requested = (leave_request.end_date - leave_request.start_date).days + 1
-                if balance.balance < days_requested:
+                if balance < days_requested:
                     return jsonify({'error': 'Insufficient leave balance'}), 400
-                balance.balance -= days_requested
+                append_entry(
+                    leave_request.user_id,
+                    leave_request.leave_type_id,
+                    -days_requested,
+                    'approval',
+                    leave_request_id=leave_request.id,
+                    created_by=admin_id
+                )
+        elif data['status'] == 'rejected' and booked < 0:
+            # Previously approved: give the days back
+            append_entry(
+                leave_request.user_id,
+                leave_request.leave_type_id,
+                -booked,
+                'reversal',
+                leave_request_id=leave_request.id,
+                created_by=admin_id
+            )
+
+        # Blackouts and team capacity may have changed since submission
+        if data['status'] == 'approved' and not was_approved:
+            blackout = find_blackout(
+                leave_request.team, leave_request.leave_type_id, leave_request.start_date, leave_request.end_date
+            )
+            if blackout:
+                db.session.rollback()
+                return jsonify({
+                    'error': 'Requested dates fall in a blackout period',
+                    'blackout': blackout.to_dict()
+                }), 409
+            try:
+                book_absence(leave_request)
+            except CapacityExceeded as e:
+                db.session.rollback()
+                return jsonify({'error': str(e)}), 409
+        elif data['status'] == 'rejected' and was_approved:
+            release_absence(leave_request)
         
+        invalidate_after_commit('dashboard', ('admin_dashboard', leave_request.organization_id))
         db.session.commit()
         
         # Send email notification
@@ -284,6 +653,9 @@ def setup_default_leave_types():
                 leave_type = LeaveType(**leave_type_data)
                 db.session.add(leave_type)
 
+        invalidate_after_commit(
+            'leave_types', current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+        )
         db.session.commit()
         return jsonify({'message': 'Default leave types set up successfully'}), 200
     except Exception as e:
@@ -291,6 +663,202 @@ def setup_default_leave_types():
         return jsonify({'error': str(e)}), 500
 
 
+@admin_bp.route('/users/<int:user_id>/team', methods=['PUT'])
+@jwt_required()
+@admin_required
+def set_user_team(user_id):
+    try:
+        user = User.query.get_or_404(user_id)
+        data = request.get_json() or {}
+        # Requests already submitted stay counted under the team they were made in
+        user.team = normalize_team(data.get('team'))
+        db.session.commit()
+        return jsonify({'message': 'Team updated', 'user': user.to_dict()}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+def _valid_leave_type_id(leave_type_id):
+    # None means every leave type; anything else must be one of this tenant's
+    if leave_type_id is None:
+        return True
+    if not isinstance(leave_type_id, int) or isinstance(leave_type_id, bool):
+        return False
+    return LeaveType.query.get(leave_type_id) is not None
+
+
+@admin_bp.route('/blackouts', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_blackouts():
+    try:
+        query = LeaveBlackout.query
+        if not request.args.get('include_past'):
+            query = query.filter(LeaveBlackout.end_date >= datetime.utcnow().date())
+        blackouts = query.order_by(LeaveBlackout.start_date).all()
+        return jsonify([blackout.to_dict() for blackout in blackouts]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/blackouts', methods=['POST'])
+@jwt_required()
+@admin_required
+def create_blackout():
+    try:
+        data = request.get_json() or {}
+        if not all(key in data for key in ['start_date', 'end_date']):
+            return jsonify({'error': 'Missing required fields'}), 400
+        try:
+            start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+        except ValueError:
+            return jsonify({'error': 'Invalid date format. Use YYYY-MM-DD'}), 400
+        if start_date > end_date:
+            return jsonify({'error': 'Start date must be before end date'}), 400
+        if not _valid_leave_type_id(data.get('leave_type_id')):
+            return jsonify({'error': 'Leave type not found'}), 400
+
+        blackout = LeaveBlackout(
+            team=normalize_team(data.get('team')),
+            leave_type_id=data.get('leave_type_id'),
+            start_date=start_date,
+            end_date=end_date,
+            reason=data.get('reason'),
+            created_by=int(get_jwt_identity())
+        )
+        db.session.add(blackout)
+        db.session.commit()
+        return jsonify({
+            'message': 'Blackout period created successfully',
+            'blackout': blackout.to_dict()
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/blackouts/<int:blackout_id>', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def delete_blackout(blackout_id):
+    try:
+        blackout = LeaveBlackout.query.get_or_404(blackout_id)
+        db.session.delete(blackout)
+        db.session.commit()
+        return jsonify({'message': 'Blackout period deleted'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/capacity-limits', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_capacity_limits():
+    try:
+        limits = CapacityLimit.query.order_by(CapacityLimit.id).all()
+        return jsonify([limit.to_dict() for limit in limits]), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/capacity-limits', methods=['POST'])
+@jwt_required()
+@admin_required
+def create_capacity_limit():
+    try:
+        data = request.get_json() or {}
+        max_absent = data.get('max_absent')
+        if not isinstance(max_absent, int) or isinstance(max_absent, bool) or max_absent < 0:
+            return jsonify({'error': 'max_absent must be a non-negative integer'}), 400
+        if not _valid_leave_type_id(data.get('leave_type_id')):
+            return jsonify({'error': 'Leave type not found'}), 400
+
+        limit = CapacityLimit(
+            team=normalize_team(data.get('team')),
+            leave_type_id=data.get('leave_type_id'),
+            max_absent=max_absent
+        )
+        db.session.add(limit)
+        db.session.commit()
+        return jsonify({
+            'message': 'Capacity limit created successfully',
+            'capacity_limit': limit.to_dict()
+        }), 201
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/capacity-limits/<int:limit_id>', methods=['DELETE'])
+@jwt_required()
+@admin_required
+def delete_capacity_limit(limit_id):
+    try:
+        limit = CapacityLimit.query.get_or_404(limit_id)
+        db.session.delete(limit)
+        db.session.commit()
+        return jsonify({'message': 'Capacity limit deleted'}), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/dashboard/summary', methods=['GET'])
+@query_budget(4)
+@jwt_required()
+@admin_required
+def dashboard_summary():
+    try:
+        organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+        return jsonify(get_dashboard_summary(organization_id)), 200
+    except Exception as e:
+        print(f"Error in dashboard_summary: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/notification-preferences', methods=['GET'])
+@jwt_required()
+@admin_required
+def get_notification_preferences():
+    try:
+        admin_id = int(get_jwt_identity())
+        preference = NotificationPreference.query.get(admin_id) or NotificationPreference(
+            user_id=admin_id, email_mode='digest'
+        )
+        return jsonify(preference.to_dict()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@admin_bp.route('/notification-preferences', methods=['PUT'])
+@jwt_required()
+@admin_required
+def update_notification_preferences():
+    try:
+        data = request.get_json()
+        if data.get('email_mode') not in NotificationPreference.EMAIL_MODES:
+            return jsonify({'error': f"email_mode must be one of {', '.join(NotificationPreference.EMAIL_MODES)}"}), 400
+
+        admin_id = int(get_jwt_identity())
+        preference = NotificationPreference.query.get(admin_id)
+        if not preference:
+            preference = NotificationPreference(user_id=admin_id)
+            db.session.add(preference)
+        preference.email_mode = data['email_mode']
+        db.session.commit()
+
+        return jsonify({
+            'message': 'Notification preferences updated successfully',
+            'preferences': preference.to_dict()
+        }), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 @admin_bp.route('/test-db', methods=['GET'])
 @jwt_required()
 @admin_required
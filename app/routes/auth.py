@@ -1,13 +1,25 @@
 # app/routes/auth.py
 from flask import Blueprint, request, jsonify, current_app
-from flask_jwt_extended import create_access_token
+from flask_jwt_extended import (
+    create_access_token, create_refresh_token, decode_token,
+    jwt_required, get_jwt, get_jwt_identity
+)
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import PyJWTError
 from app.models.models import User
 from app import db
+from app.tenancy import current_organization_id
 from app.utils.email import send_email
+from app.utils.blocklist import revoke_token
+from app.utils.capacity import normalize_team
+from app.utils.rate_limit import rate_limited
+from app.utils.digest import instant_admin_emails
+from app.utils.invalidation import invalidate_after_commit
 
 auth_bp = Blueprint('auth', __name__)
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limited('register')
 def register():
     try:
         data = request.get_json()
@@ -18,28 +30,32 @@ def register():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
 
-        # Check existing username/email
-        if User.query.filter_by(username=data['username']).first():
+        # Check existing username/email in the organization being joined
+        organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+        if User.query.filter_by(organization_id=organization_id, username=data['username']).first():
             return jsonify({'error': 'Username already exists'}), 400
             
-        if User.query.filter_by(email=data['email']).first():
+        if User.query.filter_by(organization_id=organization_id, email=data['email']).first():
             return jsonify({'error': 'Email already exists'}), 400
         
         user = User(
             username=data['username'],
             email=data['email'],
-            role='employee'
+            role='employee',
+            team=normalize_team(data.get('team'))
         )
         user.set_password(data['password'])
         
         db.session.add(user)
+        db.session.flush()
+        # Pending-approval count on the admin dashboard
+        invalidate_after_commit('dashboard', ('admin_dashboard', user.organization_id))
         db.session.commit()
 
-        # Notify admins about new registration
-        admins = User.query.filter_by(role='admin').all()
-        for admin in admins:
+        # Only admins who opted out of the daily digest are emailed right away
+        for admin_email in instant_admin_emails(user.organization_id):
             send_email(
-                admin.email,
+                admin_email,
                 'New User Registration',
                 f'New user {user.username} has registered and needs approval.'
             )
@@ -50,6 +66,7 @@ def register():
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/register/admin', methods=['POST'])
+@rate_limited('register_admin')
 def register_admin():
     try:
         data = request.get_json()
@@ -62,10 +79,11 @@ def register_admin():
         if not all(key in data for key in ['username', 'email', 'password']):
             return jsonify({'error': 'Missing required fields'}), 400
             
-        if User.query.filter_by(username=data['username']).first():
+        organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+        if User.query.filter_by(organization_id=organization_id, username=data['username']).first():
             return jsonify({'error': 'Username already exists'}), 400
             
-        if User.query.filter_by(email=data['email']).first():
+        if User.query.filter_by(organization_id=organization_id, email=data['email']).first():
             return jsonify({'error': 'Email already exists'}), 400
         
         # Create admin user
@@ -95,6 +113,7 @@ def register_admin():
         return jsonify({'error': 'Internal server error'}), 500
 
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited('login')
 def login():
     try:
         data = request.get_json()
@@ -105,7 +124,11 @@ def login():
             if field not in data:
                 return jsonify({'error': f'Missing required field: {field}'}), 400
 
-        user = User.query.filter_by(username=data['username']).first()
+        # Scoped to X-Organization when given; otherwise the name must be unambiguous
+        users = User.query.filter_by(username=data['username']).limit(2).all()
+        if len(users) > 1:
+            return jsonify({'error': 'Username exists in several organizations, send X-Organization'}), 400
+        user = users[0] if users else None
         
         if not user or not user.check_password(data['password']):
             return jsonify({'error': 'Invalid credentials'}), 401
@@ -114,10 +137,13 @@ def login():
             return jsonify({'error': 'Account not approved yet'}), 403
         
         # Create token with string ID
-        access_token = create_access_token(identity=str(user.id))
+        claims = {'org': user.organization_id}
+        access_token = create_access_token(identity=str(user.id), additional_claims=claims)
+        refresh_token = create_refresh_token(identity=str(user.id), additional_claims=claims)
         
         return jsonify({
             'access_token': access_token,
+            'refresh_token': refresh_token,
             'user': {
                 'id': user.id,
                 'username': user.username,
@@ -128,4 +154,48 @@ def login():
         }), 200
     except Exception as e:
         current_app.logger.error(f"Login error: {str(e)}")
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh():
+    try:
+        user = User.query.get(int(get_jwt_identity()))
+        if not user or not user.is_approved:
+            return jsonify({'error': 'Account not approved yet'}), 403
+
+        access_token = create_access_token(
+            identity=str(user.id),
+            additional_claims={'org': user.organization_id}
+        )
+        return jsonify({'access_token': access_token}), 200
+    except Exception as e:
+        current_app.logger.error(f"Refresh error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
+
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    try:
+        current_token = get_jwt()
+
+        # Optionally revoke the paired refresh token in the same call
+        data = request.get_json(silent=True) or {}
+        refresh_token = None
+        if data.get('refresh_token'):
+            try:
+                refresh_token = decode_token(data['refresh_token'])
+            except (PyJWTError, JWTExtendedException) as e:
+                return jsonify({'error': f'Invalid refresh token: {str(e)}'}), 401
+            if refresh_token['sub'] != current_token['sub']:
+                return jsonify({'error': 'Refresh token does not belong to this user'}), 400
+
+        revoke_token(current_token)
+        if refresh_token:
+            revoke_token(refresh_token)
+
+        return jsonify({'message': 'Logged out successfully'}), 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Logout error: {str(e)}")
+        return jsonify({'error': str(e)}), 500
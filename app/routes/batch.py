@@ -0,0 +1,21 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required
+from app.utils.batch import BatchError, parse_batch, run_batch
+from app.utils.decorators import current_principal
+
+batch_bp = Blueprint('batch', __name__)
+
+# Sub-requests carry the batch's token and are authorized one by one;
+# the batch itself only requires that the token is valid.
+
+@batch_bp.route('/batch', methods=['POST'])
+@jwt_required()
+def batch():
+    try:
+        try:
+            items = parse_batch(request.get_json(silent=True))
+        except BatchError as e:
+            return jsonify({'error': str(e)}), 400
+        return jsonify({'responses': run_batch(items, request.headers, current_principal())}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,14 +1,23 @@
 # app/routes/employee.py
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models.models import User, LeaveRequest, LeaveBalance, LeaveType, Notification
+from app.models.models import User, LeaveRequest, LeaveType, Notification, EmployeeSummary
 from app import db
 from datetime import datetime
+from app.utils.capacity import CapacityExceeded, check_capacity, find_blackout
+from app.utils.ledger import get_balance, get_balances
+from app.utils.idempotency import idempotent
+from app.utils.projection import refresh_summaries
+from app.utils.query_budget import query_budget
+from app.utils.invalidation import invalidate_after_commit
+from app.utils.listing import list_leave_requests
+from app.utils.sync import CursorExpired, parse_since, next_cursor, deleted_since, leave_request_changes
 
 employee_bp = Blueprint('employee', __name__)
 
 @employee_bp.route('/leave-requests', methods=['POST'])
 @jwt_required()
+@idempotent
 def create_leave_request():
     try:
         current_user_id = get_jwt_identity()
@@ -33,17 +42,26 @@ def create_leave_request():
         leave_type = LeaveType.query.get_or_404(data['leave_type_id'])
         days_requested = (end_date - start_date).days + 1
 
+        user = User.query.get(current_user_id)
+        blackout = find_blackout(user.team, leave_type.id, start_date, end_date)
+        if blackout:
+            return jsonify({
+                'error': 'Requested dates fall in a blackout period',
+                'blackout': blackout.to_dict()
+            }), 409
+        try:
+            check_capacity(user.organization_id, user.team, leave_type.id, start_date, end_date)
+        except CapacityExceeded as e:
+            return jsonify({'error': str(e)}), 409
+
         # Check balance only for leave types that require it
         if leave_type.requires_balance:
-            balance = LeaveBalance.query.filter_by(
-                user_id=current_user_id,
-                leave_type_id=data['leave_type_id']
-            ).first()
+            balance = get_balance(current_user_id, data['leave_type_id'])
             
-            if not balance:
+            if balance is None:
                 return jsonify({'error': 'No leave balance found for this leave type'}), 400
                 
-            if balance.balance < days_requested:
+            if balance < days_requested:
                 return jsonify({'error': 'Insufficient leave balance'}), 400
 
         leave_request = LeaveRequest(
@@ -52,10 +70,13 @@ def create_leave_request():
             start_date=start_date,
             end_date=end_date,
             reason=data.get('reason', ''),
-            status='pending'
+            status='pending',
+            team=user.team
         )
         
         db.session.add(leave_request)
+        db.session.flush()
+        invalidate_after_commit('dashboard', ('admin_dashboard', leave_request.organization_id))
         db.session.commit()
         
         return jsonify({
@@ -67,32 +88,68 @@ def create_leave_request():
         return jsonify({'error': str(e)}), 500
 
 @employee_bp.route('/leave-requests', methods=['GET'])
+@query_budget(3)
 @jwt_required()
 def get_my_leave_requests():
     try:
         current_user_id = get_jwt_identity()
         status = request.args.get('status')
-        
-        query = LeaveRequest.query.filter_by(user_id=current_user_id)
+        criteria = [LeaveRequest.user_id == int(current_user_id)]
+
+        if request.args.get('since'):
+            try:
+                since = parse_since(request.args['since'])
+            except CursorExpired:
+                return jsonify({'error': 'Cursor expired, fetch the full list again'}), 410
+            except ValueError:
+                return jsonify({'error': 'Invalid since cursor'}), 400
+
+            cursor = next_cursor()
+            changed, removed = leave_request_changes(since, *criteria, status=status)
+            return jsonify({
+                'leave_requests': changed,
+                'deleted': removed + deleted_since('leaverequests', since, user_id=current_user_id),
+                'cursor': cursor
+            }), 200
+
         if status:
-            query = query.filter_by(status=status)
+            criteria.append(LeaveRequest.status == status)
             
-        leave_requests = query.all()
-        return jsonify([lr.to_dict() for lr in leave_requests]), 200
+        cursor = next_cursor()
+        return jsonify(list_leave_requests(*criteria)), 200, {'X-Sync-Cursor': cursor}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @employee_bp.route('/leave-balance', methods=['GET'])
+@query_budget(3)
 @jwt_required()
 def get_my_leave_balance():
     try:
         current_user_id = get_jwt_identity()
-        balances = LeaveBalance.query.filter_by(user_id=current_user_id).all()
-        return jsonify([balance.to_dict() for balance in balances]), 200
+
+        if request.args.get('since'):
+            try:
+                since = parse_since(request.args['since'])
+            except CursorExpired:
+                return jsonify({'error': 'Cursor expired, fetch the full list again'}), 410
+            except ValueError:
+                return jsonify({'error': 'Invalid since cursor'}), 400
+
+            # Balances are never deleted, so there are no tombstones to send
+            cursor = next_cursor()
+            return jsonify({
+                'balances': get_balances(current_user_id, since=since),
+                'deleted': [],
+                'cursor': cursor
+            }), 200
+
+        cursor = next_cursor()
+        return jsonify(get_balances(current_user_id)), 200, {'X-Sync-Cursor': cursor}
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @employee_bp.route('/notifications', methods=['GET'])
+@query_budget(3)
 @jwt_required()
 def get_my_notifications():
     try:
@@ -124,4 +181,26 @@ def mark_notification_read(notification_id):
         }), 200
     except Exception as e:
         db.session.rollback()
-        return jsonify({'error': str(e)}), 500
\ No newline at end of file
+        return jsonify({'error': str(e)}), 500
+
+@employee_bp.route('/summary', methods=['GET'])
+@query_budget(6)
+@jwt_required()
+def get_my_summary():
+    try:
+        current_user_id = int(get_jwt_identity())
+        summary = EmployeeSummary.query.get(current_user_id)
+        
+        next_leave = summary.next_leave if summary else None
+        stale = next_leave and next_leave['end_date'] < datetime.utcnow().strftime('%Y-%m-%d')
+        
+        if not summary or stale:
+            # First visit, a user created by a bulk path, or the next leave has passed
+            refresh_summaries([current_user_id])
+            db.session.commit()
+            summary = EmployeeSummary.query.get(current_user_id)
+            
+        return jsonify(summary.to_dict()), 200
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,21 @@
+# app/routes/health.py
+from flask import Blueprint, jsonify
+from app.utils.health import get_liveness, get_readiness
+
+health_bp = Blueprint('health', __name__)
+
+# Unauthenticated on purpose: load balancers and orchestrators call these.
+# Tenant resolution skips this blueprint, so a stray X-Organization header
+# costs no query and cannot turn a probe into a 404.
+
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify(get_liveness()), 200
+
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    try:
+        readiness = get_readiness()
+        return jsonify(readiness), 200 if readiness['status'] == 'ready' else 503
+    except Exception as e:
+        return jsonify({'status': 'unavailable', 'error': str(e)}), 503
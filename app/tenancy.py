@@ -0,0 +1,174 @@
+# app/tenancy.py
+"""Organization scoping for the shared deployment.
+
+The current organization is resolved once per request and stored on `g`.
+ORM statements against tenant models are then filtered to it automatically,
+new rows are stamped with it, and the session is routed to the
+organization's own database when it has one.
+
+This module is imported before `db` exists, so it must not import from
+`app` at module level.
+"""
+from contextlib import contextmanager
+from importlib import import_module
+from flask import g, has_app_context, current_app, request, jsonify
+from flask_sqlalchemy.session import Session as FlaskSession
+from sqlalchemy import event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+
+def current_organization_id():
+    if not has_app_context():
+        return None
+    return g.get('organization_id')
+
+
+def default_bind_resolver(organization_id):
+    """Map an organization to a SQLALCHEMY_BINDS key (None = default database)."""
+    from app.models.models import Organization
+    from app.utils.cache import TTLCache
+
+    cache = current_app.extensions.setdefault('tenant_binds', TTLCache(ttl=60))
+
+    def lookup():
+        return Organization.query.with_entities(Organization.database_key).filter_by(
+            id=organization_id
+        ).scalar()
+
+    return cache.get_or_set(organization_id, lookup)
+
+
+def _bind_resolver():
+    resolver = current_app.config.get('TENANT_BIND_RESOLVER') or default_bind_resolver
+    if isinstance(resolver, str):
+        module_name, _, attribute = resolver.rpartition('.')
+        resolver = getattr(import_module(module_name), attribute)
+    return resolver
+
+
+class TenantRoutingSession(FlaskSession):
+    """Sends tenant queries to the organization's bind when it has one."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            bind_key = g.get('tenant_bind_key')
+            pinned = mapper is not None and getattr(mapper.class_, '__global_bind__', False)
+            if bind_key and not pinned:
+                return self._db.engines[bind_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _tenant_models():
+    from app.models.models import User, LeaveType, LeaveRequest, LeaveBlackout, CapacityLimit
+    return (User, LeaveType, LeaveRequest, LeaveBlackout, CapacityLimit)
+
+
+def _add_tenant_criteria(execute_state):
+    organization_id = current_organization_id()
+    if organization_id is None or execute_state.execution_options.get('skip_tenant_filter'):
+        return
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        # The parent query was already scoped
+        return
+
+    execute_state.statement = execute_state.statement.options(*[
+        with_loader_criteria(
+            model,
+            lambda cls: cls.organization_id == organization_id,
+            include_aliases=True
+        ) for model in _tenant_models()
+    ])
+
+
+def _stamp_organization(mapper, connection, target):
+    if target.organization_id is None:
+        target.organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+
+
+_UNCACHED = object()
+
+# Probes answer the same for every organization and must not depend on headers
+UNSCOPED_BLUEPRINTS = ('health',)
+
+
+def resolve_tenant():
+    """before_request hook: work out which organization this request belongs to.
+
+    Authenticated requests use the token's `org` claim. Unauthenticated ones
+    (registration, login) may name an organization with X-Organization.
+    Without it no tenant filter applies: registration joins the default
+    organization, and login searches every organization stored in the
+    default database. Organizations with a database of their own must send
+    the header to log in.
+    """
+    from flask_jwt_extended import decode_token
+    from app.models.models import Organization
+    from app.utils.cache import TTLCache
+    from app.utils.rate_limit import check_rate_limit
+
+    g.organization_id = None
+    g.tenant_bind_key = None
+    if request.blueprint in UNSCOPED_BLUEPRINTS:
+        return
+
+    auth_header = request.headers.get('Authorization', '')
+    if auth_header.startswith('Bearer '):
+        try:
+            # Signature check only; @jwt_required still does the full verification
+            g.organization_id = decode_token(auth_header[7:], allow_expired=True).get('org')
+        except Exception:
+            pass
+
+    slug = request.headers.get('X-Organization')
+    if g.organization_id is None and slug:
+        cache = current_app.extensions.setdefault('organization_slugs', TTLCache(
+            ttl=current_app.config.get('ORGANIZATION_SLUG_CACHE_SECONDS', 60), maxsize=4096
+        ))
+        if cache.get(slug, _UNCACHED) is _UNCACHED:
+            # Runs before the views' own limits; random slugs must not reach the database freely
+            rejection = check_rate_limit('tenant_lookup')
+            if rejection is not None:
+                return rejection
+        g.organization_id = cache.get_or_set(
+            slug, lambda: Organization.query.with_entities(Organization.id).filter_by(slug=slug).scalar()
+        )
+        if g.organization_id is None:
+            return jsonify({'error': 'Unknown organization'}), 404
+
+    if g.organization_id is not None:
+        g.tenant_bind_key = _bind_resolver()(g.organization_id)
+
+
+def tenant_database_keys():
+    """Bind keys of every database holding tenant data (None = default)."""
+    from app import db
+    from app.models.models import Organization
+
+    keys = db.session.query(Organization.database_key).filter(
+        Organization.database_key.isnot(None)
+    ).distinct().all()
+    return [None] + sorted(key for (key,) in keys)
+
+
+@contextmanager
+def using_database(bind_key):
+    """Route the session to one tenant database, for CLI jobs that visit each."""
+    from app import db
+
+    db.session.remove()
+    g.tenant_bind_key = bind_key
+    try:
+        yield
+    finally:
+        db.session.remove()
+        g.tenant_bind_key = None
+
+
+def init_tenancy(app):
+    if not event.contains(Session, 'do_orm_execute', _add_tenant_criteria):
+        event.listen(Session, 'do_orm_execute', _add_tenant_criteria)
+        for model in _tenant_models():
+            event.listen(model, 'before_insert', _stamp_organization)
+    app.before_request(resolve_tenant)
@@ -0,0 +1,129 @@
+# app/utils/batch.py
+"""Run several API calls from one /batch request.
+
+Sub-requests go through the normal dispatch (before_request hooks, token
+check, decorators, after_request hooks), so each behaves exactly as if it
+had been sent on its own. Runs of consecutive GETs are dispatched
+concurrently, each in its own app context and therefore its own session
+and connection. Anything else runs alone, in order, in the batch's own app
+context and session, so a later sub-request always sees the writes of an
+earlier one. The caller's principal is resolved once and seeded into every
+sub-request, so admin_required does not look the user up again.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app, g, request
+from werkzeug.test import EnvironBuilder
+from app import db
+
+METHODS = ('GET', 'POST', 'PUT', 'DELETE')
+# Forwarded from the batch request unless a sub-request sets its own
+SHARED_HEADERS = ('Authorization', 'X-Organization')
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_batch(data):
+    """Validate the body and return the list of sub-requests."""
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise BatchError('requests must be a non-empty list')
+    limit = current_app.config.get('BATCH_MAX_REQUESTS', 20)
+    if len(items) > limit:
+        raise BatchError(f'At most {limit} requests per batch')
+
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise BatchError(f'Request {index}: path is required')
+        if not item['path'].startswith('/'):
+            raise BatchError(f'Request {index}: path must start with /')
+        if item['path'].split('?')[0].rstrip('/') == '/batch':
+            raise BatchError(f'Request {index}: batches cannot be nested')
+        if item['path'].startswith('/auth/'):
+            # Login, registration and token calls are rate limited per client
+            # and make no sense inside an already authenticated batch
+            raise BatchError(f'Request {index}: /auth endpoints cannot be batched')
+        method = item.get('method', 'GET')
+        if not isinstance(method, str) or method.upper() not in METHODS:
+            raise BatchError(f"Request {index}: method must be one of {', '.join(METHODS)}")
+        if not isinstance(item.get('headers', {}), dict):
+            raise BatchError(f'Request {index}: headers must be an object')
+    return items
+
+
+def _dispatch(app, item, headers, remote_addr):
+    method = item.get('method', 'GET').upper()
+    builder = EnvironBuilder(
+        path=item['path'],
+        method=method,
+        headers={**headers, **item.get('headers', {})},
+        json=item['body'] if 'body' in item else None,
+        # The batch caller's address, so per-client rate limits still apply
+        environ_base={'REMOTE_ADDR': remote_addr}
+    )
+    try:
+        with app.request_context(builder.get_environ()):
+            response = app.full_dispatch_request()
+    except Exception as e:
+        current_app.logger.error(f"Batch sub-request {method} {item['path']} failed: {str(e)}")
+        return {'status': 500, 'headers': {}, 'body': {'error': str(e)}}
+    finally:
+        builder.close()
+
+    body = response.get_json(silent=True)
+    return {
+        'status': response.status_code,
+        'headers': {key: value for key, value in response.headers.items()
+                    if key not in ('Content-Type', 'Content-Length')},
+        'body': body if body is not None else response.get_data(as_text=True)
+    }
+
+
+def _dispatch_read(app, item, headers, remote_addr, principal):
+    # A fresh app context per thread: its own g, session and connection
+    with app.app_context():
+        g.principal = principal
+        return _dispatch(app, item, headers, remote_addr)
+
+
+def _dispatch_write(app, item, headers, remote_addr):
+    # The request context reuses the batch's app context, so writes share its session
+    result = _dispatch(app, item, headers, remote_addr)
+    # Views commit their own work; drop anything a failed one left behind
+    # so the next write cannot commit it
+    db.session.rollback()
+    return result
+
+
+def run_batch(items, request_headers, principal):
+    """Dispatch the sub-requests and return their results in request order."""
+    app = current_app._get_current_object()
+    headers = {name: request_headers[name] for name in SHARED_HEADERS if name in request_headers}
+    remote_addr = request.remote_addr
+    g.principal = principal
+    # Return the connection the principal lookup checked out; otherwise it
+    # stays idle in a transaction while every concurrent read takes another
+    db.session.close()
+    workers = current_app.config.get('BATCH_MAX_CONCURRENCY', 4)
+
+    results = [None] * len(items)
+    reads = []
+
+    def flush_reads(executor):
+        futures = [(index, executor.submit(_dispatch_read, app, items[index], headers, remote_addr, principal))
+                   for index in reads]
+        for index, future in futures:
+            results[index] = future.result()
+        reads.clear()
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        for index, item in enumerate(items):
+            if item.get('method', 'GET').upper() == 'GET':
+                reads.append(index)
+                continue
+            flush_reads(executor)
+            results[index] = _dispatch_write(app, item, headers, remote_addr)
+        flush_reads(executor)
+
+    return [dict(result, id=item.get('id', index)) for index, (item, result) in enumerate(zip(items, results))]
@@ -0,0 +1,186 @@
+# app/utils/blocklist.py
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models.models import TokenBlocklist
+from app.utils.invalidation import invalidate_after_commit
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over a single blake2b digest."""
+
+    def __init__(self, capacity, error_rate):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+
+def _jti_key(jti):
+    return f'jti:{jti}'
+
+
+def token_issued_at(jwt_payload):
+    """When the token was issued, to the microsecond when it says so.
+
+    iat is whole seconds, which would also revoke a token issued in the same
+    second just after a user-wide revocation.
+    """
+    if 'iat_us' in jwt_payload:
+        return datetime.utcfromtimestamp(jwt_payload['iat_us'] / 1000000)
+    return datetime.utcfromtimestamp(jwt_payload.get('iat', 0))
+
+
+def _user_key(organization_id, user_id):
+    # User ids are only unique within an organization's database
+    return f'user:{organization_id}:{user_id}'
+
+
+class RevocationCache:
+    """In-memory view of the revocation table.
+
+    Every request is answered from the Bloom filter; the database is only
+    consulted when the filter reports a (possibly false) hit. The filter is
+    rebuilt from the table every BLOCKLIST_REFRESH_SECONDS so revocations made
+    by other workers become visible within that window.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held while rebuilding, so a stale filter is rebuilt by one thread only
+        self._refresh_lock = threading.Lock()
+        self._filter = None
+        self._loaded_at = 0.0
+        self._generation = 0
+        # Keys added while a rebuild is querying the table, replayed into it
+        self._pending = None
+
+    def _new_filter(self, count):
+        config = current_app.config
+        capacity = max(config.get('BLOCKLIST_BLOOM_CAPACITY', 100000), count * 2)
+        return BloomFilter(capacity, config.get('BLOCKLIST_BLOOM_ERROR_RATE', 0.001))
+
+    def refresh(self):
+        with self._lock:
+            generation = self._generation
+            self._pending = []
+        now = datetime.utcnow()
+        rows = db.session.query(
+            TokenBlocklist.jti, TokenBlocklist.organization_id, TokenBlocklist.user_id
+        ).filter(
+            TokenBlocklist.expires_at > now
+        ).all()
+
+        bloom = self._new_filter(len(rows))
+        for jti, organization_id, user_id in rows:
+            bloom.add(_jti_key(jti) if jti else _user_key(organization_id, user_id))
+
+        with self._lock:
+            for key in self._pending:
+                bloom.add(key)
+            self._pending = None
+            self._filter = bloom
+            # Invalidated while the query ran: it may have missed that revocation
+            self._loaded_at = time.monotonic() if generation == self._generation else 0.0
+
+    def _is_stale(self):
+        interval = current_app.config.get('BLOCKLIST_REFRESH_SECONDS', 30)
+        return self._filter is None or time.monotonic() - self._loaded_at > interval
+
+    def _current_filter(self):
+        if self._is_stale():
+            with self._refresh_lock:
+                # Another thread may have rebuilt it while this one waited
+                if self._is_stale():
+                    self.refresh()
+        return self._filter
+
+    def invalidate(self, key=None):
+        # Another worker revoked something: rebuild on the next check
+        with self._lock:
+            self._generation += 1
+            self._loaded_at = 0.0
+
+    def add(self, jti=None, organization_id=None, user_id=None):
+        key = _jti_key(jti) if jti else _user_key(organization_id, user_id)
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(key)
+            if self._pending is not None:
+                self._pending.append(key)
+
+    def is_revoked(self, jwt_payload):
+        bloom = self._current_filter()
+        jti = jwt_payload.get('jti')
+        user_id = jwt_payload.get('sub')
+        organization_id = jwt_payload.get('org')
+
+        if jti and _jti_key(jti) in bloom:
+            if db.session.query(TokenBlocklist.id).filter_by(jti=jti).first():
+                return True
+
+        if user_id and _user_key(organization_id, user_id) in bloom:
+            issued_at = token_issued_at(jwt_payload)
+            if db.session.query(TokenBlocklist.id).filter(
+                TokenBlocklist.user_id == int(user_id),
+                TokenBlocklist.organization_id.is_(None) if organization_id is None
+                else TokenBlocklist.organization_id == organization_id,
+                TokenBlocklist.jti.is_(None),
+                TokenBlocklist.created_at >= issued_at
+            ).first():
+                return True
+
+        return False
+
+
+revocation_cache = RevocationCache()
+
+
+def revoke_token(jwt_payload):
+    """Add a single decoded token to the blocklist."""
+    entry = TokenBlocklist(
+        jti=jwt_payload['jti'],
+        user_id=int(jwt_payload['sub']),
+        organization_id=jwt_payload.get('org'),
+        token_type=jwt_payload.get('type', 'access'),
+        expires_at=datetime.utcfromtimestamp(jwt_payload['exp'])
+    )
+    db.session.add(entry)
+    invalidate_after_commit('revocations')
+    db.session.commit()
+    revocation_cache.add(jti=entry.jti)
+    return entry
+
+
+def revoke_user_tokens(user_id, organization_id):
+    """Revoke every token issued to a user up to now (disable or demotion)."""
+    refresh_lifetime = current_app.config['JWT_REFRESH_TOKEN_EXPIRES']
+    entry = TokenBlocklist(
+        user_id=user_id,
+        organization_id=organization_id,
+        token_type='all',
+        expires_at=datetime.utcnow() + refresh_lifetime
+    )
+    db.session.add(entry)
+    invalidate_after_commit('revocations')
+    db.session.commit()
+    revocation_cache.add(organization_id=organization_id, user_id=user_id)
+    return entry
@@ -0,0 +1,149 @@
+# app/utils/bulk_users.py
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.tenancy import current_organization_id
+from app.models.models import User
+from app.utils.invalidation import invalidate_after_commit
+from app.utils.outbox import queue_emails
+
+ACTIONS = ('approve', 'reject', 'set_role')
+ROLES = ('employee', 'admin')
+
+# Rejected registrations are deleted so the username and email can be reused.
+# Rows a pending account can already have (bulk-import seeding, the summary
+# projection) go in the same statement; accounts with leave requests are
+# left alone. Foreign keys are checked at the end of the statement, after
+# every CTE has run.
+REJECT_SQL = """
+    WITH rejected AS (
+        SELECT id FROM users
+        WHERE {targets}
+          AND organization_id = :org
+          AND NOT is_approved
+          AND NOT EXISTS (SELECT 1 FROM leaverequests lr WHERE lr.user_id = users.id)
+        FOR UPDATE
+    ),
+    summaries AS (DELETE FROM employeesummaries WHERE user_id IN (SELECT id FROM rejected)),
+    ledger AS (DELETE FROM leaveledger WHERE user_id IN (SELECT id FROM rejected)),
+    balances AS (DELETE FROM leavebalances WHERE user_id IN (SELECT id FROM rejected)),
+    preferences AS (DELETE FROM notificationpreferences WHERE user_id IN (SELECT id FROM rejected)),
+    notifications AS (DELETE FROM notifications WHERE user_id IN (SELECT id FROM rejected))
+    DELETE FROM users WHERE id IN (SELECT id FROM rejected)
+    RETURNING id, username, email
+"""
+
+EMAILS = {
+    'approve': ('Account Approved', 'Your account has been approved. You can now login to the system.'),
+    'reject': ('Registration Declined', 'Your registration for the leave management system was declined.'),
+}
+
+
+class BulkActionError(ValueError):
+    pass
+
+
+def _target_criteria(user_ids, filters):
+    """ORM criteria plus an equivalent SQL fragment and params for REJECT_SQL."""
+    if user_ids:
+        return [User.id.in_(user_ids)], 'id = ANY(:user_ids)', {'user_ids': user_ids}
+
+    criteria, sql, params = [], [], {}
+    if filters.get('pending'):
+        criteria.append(User.is_approved.is_(False))
+        sql.append('NOT is_approved')
+    if filters.get('role'):
+        criteria.append(User.role == filters['role'])
+        sql.append('role = :filter_role')
+        params['filter_role'] = filters['role']
+    if filters.get('username_prefix'):
+        escaped = filters['username_prefix'].lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        criteria.append(db.func.lower(User.username).like(f'{escaped}%'))
+        sql.append('lower(username) LIKE :username_prefix')
+        params['username_prefix'] = f'{escaped}%'
+    if filters.get('registered_before'):
+        try:
+            before = datetime.strptime(filters['registered_before'], '%Y-%m-%d')
+        except ValueError:
+            raise BulkActionError('Invalid registered_before. Use YYYY-MM-DD')
+        criteria.append(User.created_at < before)
+        sql.append('created_at < :registered_before')
+        params['registered_before'] = before
+
+    if not criteria:
+        # Never act on every user by accident
+        raise BulkActionError('Provide user_ids or at least one filter')
+    return criteria, ' AND '.join(sql), params
+
+
+def bulk_user_action(action, user_ids=None, filters=None, role=None, admin_id=None, notify=True):
+    """Approve, reject or change the role of many users in one statement.
+
+    Returns a per-user report. Explicit ids that were not changed are
+    reported with the reason.
+    """
+    if action not in ACTIONS:
+        raise BulkActionError(f"Unknown action. Use one of: {', '.join(ACTIONS)}")
+    if action == 'set_role' and role not in ROLES:
+        raise BulkActionError(f"Invalid role. Use one of: {', '.join(ROLES)}")
+
+    user_ids = sorted({int(user_id) for user_id in user_ids or []})
+    limit = current_app.config.get('BULK_USER_ACTION_LIMIT', 1000)
+    if len(user_ids) > limit:
+        raise BulkActionError(f'At most {limit} user ids per call')
+
+    criteria, targets_sql, params = _target_criteria(user_ids, filters or {})
+    organization_id = current_organization_id() or current_app.config['DEFAULT_ORGANIZATION_ID']
+
+    if action == 'approve':
+        changed = db.session.execute(
+            db.update(User).where(*criteria, User.is_approved.is_(False)).values(
+                is_approved=True
+            ).returning(User.id, User.username, User.email).execution_options(synchronize_session=False)
+        ).all()
+        status = 'approved'
+    elif action == 'reject':
+        changed = db.session.execute(
+            db.text(REJECT_SQL.format(targets=targets_sql)),
+            dict(params, org=organization_id)
+        ).all()
+        status = 'rejected'
+    else:
+        # Admins cannot change their own role, so nobody can lock themselves out
+        changed = db.session.execute(
+            db.update(User).where(*criteria, User.role != role, User.id != admin_id).values(
+                role=role
+            ).returning(User.id, User.username, User.email).execution_options(synchronize_session=False)
+        ).all()
+        status = 'updated'
+
+    if notify and action in EMAILS:
+        subject, body = EMAILS[action]
+        queue_emails((row.email, subject, body) for row in changed)
+    invalidate_after_commit('dashboard', ('admin_dashboard', organization_id))
+    db.session.commit()
+
+    results = [{'id': row.id, 'username': row.username, 'status': status} for row in changed]
+
+    missing = sorted(set(user_ids) - {row.id for row in changed})
+    if missing:
+        existing = {row.id: row for row in db.session.query(
+            User.id, User.username, User.is_approved, User.role
+        ).filter(User.id.in_(missing)).all()}
+        for user_id in missing:
+            row = existing.get(user_id)
+            if row is None:
+                results.append({'id': user_id, 'status': 'not_found'})
+            elif action == 'approve' or (action == 'reject' and row.is_approved):
+                results.append({'id': user_id, 'username': row.username, 'status': 'skipped',
+                                'reason': 'Already approved'})
+            elif action == 'reject':
+                results.append({'id': user_id, 'username': row.username, 'status': 'skipped',
+                                'reason': 'User has leave requests'})
+            elif user_id == admin_id:
+                results.append({'id': user_id, 'username': row.username, 'status': 'skipped',
+                                'reason': 'Cannot change your own role'})
+            else:
+                results.append({'id': user_id, 'username': row.username, 'status': 'skipped',
+                                'reason': f'Already {row.role}'})
+    return results
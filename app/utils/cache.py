@@ -0,0 +1,84 @@
+# app/utils/cache.py
+import threading
+import time
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry.
+
+    get_or_set() lets only one thread compute a missing key while the others
+    wait for its result, so an expired entry never causes a burst of identical
+    queries. Every invalidation bumps a per-key version; a value computed while
+    its key was invalidated is returned to the caller but not stored, so a
+    slow computation can never put stale data back after the invalidation.
+    Versions are per process: other workers only see an invalidation once
+    the bus (app.utils.invalidation) delivers it to them.
+    """
+
+    def __init__(self, ttl, maxsize=1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._key_locks = {}
+        self._versions = {}
+        self._generation = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if len(self._entries) >= self.maxsize and key not in self._entries:
+                # Drop the entry closest to expiry to make room
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (expires_at, value)
+
+    def _version(self, key):
+        return self._generation, self._versions.get(key, 0)
+
+    def get_or_set(self, key, factory, ttl=None):
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            value = self.get(key, _MISSING)
+            if value is _MISSING:
+                with self._lock:
+                    version = self._version(key)
+                value = factory()
+                with self._lock:
+                    current = self._version(key) == version
+                if current:
+                    self.set(key, value, ttl)
+            with self._lock:
+                # Waiters already hold it; newcomers find the value. Keeps
+                # one-off keys from piling up locks
+                if self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+        return value
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+                self._versions.clear()
+                self._generation += 1
+            else:
+                self._entries.pop(key, None)
+                self._versions[key] = self._versions.get(key, 0) + 1
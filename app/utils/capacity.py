@@ -0,0 +1,156 @@
+# app/utils/capacity.py
+"""Blackout windows and concurrent-absence limits.
+
+Approved absences are counted in leavedaycounts, one row per organization,
+team, leave type and day, incremented on approval and decremented when an
+approval is reversed. Checking a request is a range scan over its days in
+that table instead of re-aggregating every overlapping leave request.
+"""
+from app import db
+from app.models.models import LeaveBlackout, CapacityLimit
+
+# Advisory lock namespace; the two-key form with a negative first key cannot
+# collide with ledger.lock_balance, which uses (user_id, leave_type_id)
+LOCK_NAMESPACE = -46
+
+BOOK_SQL = db.text("""
+    INSERT INTO leavedaycounts (organization_id, team, leave_type_id, day, absent)
+    SELECT :org, :team, :leave_type_id, day::date, :delta
+    FROM generate_series(CAST(:start_date AS date), CAST(:end_date AS date), interval '1 day') AS day
+    ON CONFLICT (organization_id, team, leave_type_id, day) DO UPDATE
+    SET absent = leavedaycounts.absent + EXCLUDED.absent
+""")
+
+# First day on which a limit would be exceeded, given `extra` more absences
+OVER_LIMIT_SQL = """
+    SELECT day, sum(absent) AS absent
+    FROM leavedaycounts
+    WHERE organization_id = :org
+      AND day BETWEEN :start_date AND :end_date
+      {scope}
+    GROUP BY day
+    HAVING sum(absent) + :extra > :max_absent
+    ORDER BY day
+    LIMIT 1
+"""
+
+REBUILD_SQL = db.text("""
+    INSERT INTO leavedaycounts (organization_id, team, leave_type_id, day, absent)
+    SELECT lr.organization_id, coalesce(lr.team, ''), lr.leave_type_id, day::date, count(*)
+    FROM leaverequests lr
+    CROSS JOIN LATERAL generate_series(lr.start_date, lr.end_date, interval '1 day') AS day
+    WHERE lr.organization_id = :org AND lr.status = 'approved'
+    GROUP BY lr.organization_id, coalesce(lr.team, ''), lr.leave_type_id, day::date
+""")
+
+
+class CapacityExceeded(Exception):
+    def __init__(self, limit, day, absent):
+        self.limit = limit
+        self.day = day
+        self.absent = absent
+        scope = f"team {limit.team}" if limit.team else 'the organization'
+        super().__init__(
+            f"Capacity reached for {scope} on {day.strftime('%Y-%m-%d')} "
+            f"({absent} of {limit.max_absent} already absent)"
+        )
+
+
+def normalize_team(team):
+    """Team names are matched exactly, so store them trimmed and blank as None."""
+    if not isinstance(team, str):
+        return None
+    return team.strip() or None
+
+
+def _applies(model, team, leave_type_id):
+    return [
+        db.or_(model.team.is_(None), model.team == team) if team else model.team.is_(None),
+        db.or_(model.leave_type_id.is_(None), model.leave_type_id == leave_type_id),
+    ]
+
+
+def find_blackout(team, leave_type_id, start_date, end_date):
+    """The first blackout overlapping the dates for this team and leave type, if any."""
+    return LeaveBlackout.query.filter(
+        LeaveBlackout.start_date <= end_date,
+        LeaveBlackout.end_date >= start_date,
+        *_applies(LeaveBlackout, team, leave_type_id)
+    ).order_by(LeaveBlackout.start_date).first()
+
+
+def applicable_limits(team, leave_type_id):
+    return CapacityLimit.query.filter(
+        *_applies(CapacityLimit, team, leave_type_id)
+    ).order_by(CapacityLimit.id).all()
+
+
+def _first_day_over(organization_id, limit, start_date, end_date, extra):
+    scope, params = [], {}
+    if limit.team is not None:
+        scope.append('AND team = :team')
+        params['team'] = limit.team
+    if limit.leave_type_id is not None:
+        scope.append('AND leave_type_id = :leave_type_id')
+        params['leave_type_id'] = limit.leave_type_id
+    return db.session.execute(db.text(OVER_LIMIT_SQL.format(scope=' '.join(scope))), dict(
+        params,
+        org=organization_id,
+        start_date=start_date,
+        end_date=end_date,
+        extra=extra,
+        max_absent=limit.max_absent
+    )).first()
+
+
+def check_capacity(organization_id, team, leave_type_id, start_date, end_date):
+    """Raise CapacityExceeded if one more absence would break a limit on any day."""
+    for limit in applicable_limits(team, leave_type_id):
+        over = _first_day_over(organization_id, limit, start_date, end_date, 1)
+        if over:
+            raise CapacityExceeded(limit, over.day, over.absent)
+
+
+def _update_counts(leave_request, delta):
+    db.session.execute(BOOK_SQL, {
+        'org': leave_request.organization_id,
+        'team': leave_request.team or '',
+        'leave_type_id': leave_request.leave_type_id,
+        'start_date': leave_request.start_date,
+        'end_date': leave_request.end_date,
+        'delta': delta
+    })
+
+
+def book_absence(leave_request):
+    """Count an approval, failing if that takes any day over a limit. Does not commit.
+
+    Each applicable limit is locked for the rest of the transaction, so two
+    approvals counted against the same limit cannot both take the last place.
+    """
+    limits = applicable_limits(leave_request.team, leave_request.leave_type_id)
+    for limit in limits:
+        db.session.execute(
+            db.text('SELECT pg_advisory_xact_lock(:namespace, :limit_id)'),
+            {'namespace': LOCK_NAMESPACE, 'limit_id': int(limit.id)}
+        )
+    _update_counts(leave_request, 1)
+    for limit in limits:
+        over = _first_day_over(
+            leave_request.organization_id, limit, leave_request.start_date, leave_request.end_date, 0
+        )
+        if over:
+            raise CapacityExceeded(limit, over.day, over.absent - 1)
+
+
+def release_absence(leave_request):
+    """Undo book_absence for an approval being reversed. Does not commit."""
+    _update_counts(leave_request, -1)
+
+
+def rebuild_counts(organization_id):
+    """Recompute an organization's counters from its approved requests."""
+    db.session.execute(db.text('DELETE FROM leavedaycounts WHERE organization_id = :org'),
+                       {'org': organization_id})
+    db.session.execute(REBUILD_SQL, {'org': organization_id})
+    db.session.commit()
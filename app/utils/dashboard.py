@@ -0,0 +1,63 @@
+# app/utils/dashboard.py
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.utils.cache import TTLCache
+
+dashboard_cache = TTLCache(ttl=5)
+
+# Every figure on the admin landing page in a single round trip
+SUMMARY_SQL = db.text("""
+    SELECT
+        (SELECT count(*) FROM users WHERE NOT is_approved AND organization_id = :org) AS pending_users,
+        (SELECT coalesce(json_object_agg(name, requests), '{}'::json)
+         FROM (
+             SELECT lt.name, count(*) AS requests
+             FROM leaverequests lr
+             JOIN leavetypes lt ON lt.id = lr.leave_type_id
+             WHERE lr.status = 'pending' AND lr.organization_id = :org
+             GROUP BY lt.name
+         ) pending) AS pending_by_type,
+        (SELECT count(DISTINCT user_id)
+         FROM leaverequests
+         WHERE status = 'approved'
+           AND organization_id = :org
+           AND daterange(start_date, end_date, '[]') @> CAST(:today AS date)) AS absent_today,
+        (SELECT json_agg(json_build_object('date', to_char(day, 'YYYY-MM-DD'), 'absences', absences) ORDER BY day)
+         FROM (
+             SELECT day::date AS day, count(DISTINCT lr.user_id) AS absences
+             FROM generate_series(CAST(:today AS date), CAST(:week_end AS date), interval '1 day') AS day
+             LEFT JOIN leaverequests lr
+               ON lr.status = 'approved'
+              AND lr.organization_id = :org
+              AND daterange(lr.start_date, lr.end_date, '[]') @> day::date
+             GROUP BY day
+         ) week) AS upcoming_week
+""")
+
+
+def _compute_summary(organization_id):
+    today = datetime.utcnow().date()
+    row = db.session.execute(SUMMARY_SQL, {
+        'org': organization_id,
+        'today': today,
+        'week_end': today + timedelta(days=6)
+    }).one()
+    return {
+        'pending_users': row.pending_users,
+        'pending_requests_by_type': row.pending_by_type,
+        'pending_requests': sum(row.pending_by_type.values()),
+        'absent_today': row.absent_today,
+        'upcoming_week': row.upcoming_week,
+        'generated_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def get_dashboard_summary(organization_id):
+    """Shared by every admin of an organization; recomputed at most once per DASHBOARD_CACHE_SECONDS."""
+    ttl = current_app.config.get('DASHBOARD_CACHE_SECONDS', 5)
+    return dashboard_cache.get_or_set(
+        ('admin_dashboard', organization_id),
+        lambda: _compute_summary(organization_id),
+        ttl=ttl
+    )
@@ -1,24 +1,36 @@
 # app/utils/decorators.py
 from functools import wraps
-from flask import jsonify, current_app
+from flask import g, jsonify, current_app
 from flask_jwt_extended import get_jwt_identity
+from app import db
 from app.models.models import User
 
+def current_principal():
+    """(user_id, role) of the token's user, looked up once per app context.
+
+    /batch seeds it into each sub-request, so a batch of admin calls costs
+    one lookup instead of one per call.
+    """
+    user_id = int(get_jwt_identity())
+    principal = g.get('principal')
+    if principal is None or principal[0] != user_id:
+        user = User.query.get(user_id)
+        principal = g.principal = (user_id, user.role if user else None)
+    return principal
+
+
 def admin_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            current_user_id = get_jwt_identity()
-            current_app.logger.debug(f"JWT identity: {current_user_id}")
+            current_app.logger.debug(f"JWT identity: {get_jwt_identity()}")
+            _, role = current_principal()
             
-            # Convert string ID back to integer
-            user_id = int(current_user_id)
-            user = User.query.get(user_id)
-            
-            if not user or user.role != 'admin':
+            if role != 'admin':
                 return jsonify({'error': 'Admin privileges required'}), 403
             return f(*args, **kwargs)
         except Exception as e:
             current_app.logger.error(f"Admin decorator error: {str(e)}")
             return jsonify({'error': 'Authorization error'}), 401
-    return decorated_function
\ No newline at end of file
+    return decorated_function
+
@@ -0,0 +1,125 @@
+# app/utils/digest.py
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.dialects.postgresql import aggregate_order_by, insert as pg_insert
+from app import db
+from app.models.models import User, LeaveRequest, LeaveType, NotificationPreference
+from app.utils.email import send_emails
+
+
+def _digest_recipients():
+    """Admins on the digest, grouped by organization and last digest time."""
+    rows = db.session.query(
+        User.id, User.email, User.organization_id, NotificationPreference.last_digest_at
+    ).outerjoin(
+        NotificationPreference, NotificationPreference.user_id == User.id
+    ).filter(
+        User.role == 'admin',
+        db.func.coalesce(NotificationPreference.email_mode, 'digest') == 'digest'
+    ).all()
+
+    default_since = datetime.utcnow() - timedelta(hours=current_app.config.get('DIGEST_DEFAULT_WINDOW_HOURS', 24))
+    groups = defaultdict(list)
+    for user_id, email, organization_id, last_digest_at in rows:
+        groups[(organization_id, last_digest_at or default_since)].append((user_id, email))
+    return groups
+
+
+def _activity_since(organization_id, since, until):
+    """Everything a digest reports in (since, until], from two grouped queries."""
+    sample_size = current_app.config.get('DIGEST_SAMPLE_SIZE', 20)
+    registrations = db.session.query(
+        db.func.count(User.id),
+        db.func.array_agg(aggregate_order_by(User.username, User.created_at))
+    ).filter(
+        User.organization_id == organization_id,
+        User.is_approved.is_(False),
+        User.created_at > since,
+        User.created_at <= until
+    ).one()
+
+    requests_by_type = db.session.query(
+        LeaveType.name, db.func.count(LeaveRequest.id)
+    ).join(LeaveType, LeaveType.id == LeaveRequest.leave_type_id).filter(
+        LeaveRequest.organization_id == organization_id,
+        LeaveRequest.status == 'pending',
+        LeaveRequest.created_at > since,
+        LeaveRequest.created_at <= until
+    ).group_by(LeaveType.name).order_by(LeaveType.name).all()
+
+    count, usernames = registrations
+    return {
+        'registrations': count,
+        'usernames': (usernames or [])[:sample_size],
+        'requests_by_type': requests_by_type
+    }
+
+
+def _format_digest(activity, since):
+    lines = [f"Activity since {since.strftime('%Y-%m-%d %H:%M')} UTC", '']
+    lines.append(f"New registrations awaiting approval: {activity['registrations']}")
+    for username in activity['usernames']:
+        lines.append(f'  - {username}')
+    if activity['registrations'] > len(activity['usernames']):
+        lines.append(f"  ... and {activity['registrations'] - len(activity['usernames'])} more")
+
+    total_requests = sum(count for _, count in activity['requests_by_type'])
+    lines.append('')
+    lines.append(f'New leave requests awaiting a decision: {total_requests}')
+    for name, count in activity['requests_by_type']:
+        lines.append(f'  - {name}: {count}')
+    return '\n'.join(lines)
+
+
+def send_admin_digests():
+    """Send one summary email per digest admin and advance their watermark.
+
+    Admins of one organization who share a watermark (the normal case) share
+    one set of queries. Activity is counted up to the start of the run, which
+    becomes the new watermark, so nothing arriving meanwhile is reported twice.
+    Returns the number of emails sent.
+    """
+    started_at = datetime.utcnow()
+    messages = []
+    # Admins each message goes to, and admins with nothing to report
+    owners = []
+    quiet = []
+
+    for (organization_id, since), admins in _digest_recipients().items():
+        activity = _activity_since(organization_id, since, started_at)
+        if not activity['registrations'] and not activity['requests_by_type']:
+            quiet.extend(user_id for user_id, _ in admins)
+            continue
+        body = _format_digest(activity, since)
+        for user_id, email in admins:
+            messages.append((email, 'Leave Management Daily Digest', body))
+            owners.append(user_id)
+
+    sent = send_emails(messages) if messages else 0
+    # send_emails stops at the first failure, so exactly the first `sent`
+    # went out; everyone after keeps the old watermark and is retried next run
+    recipients = quiet + owners[:sent]
+
+    if recipients:
+        upsert = pg_insert(NotificationPreference).values([
+            {'user_id': user_id, 'email_mode': 'digest', 'last_digest_at': started_at}
+            for user_id in recipients
+        ])
+        db.session.execute(upsert.on_conflict_do_update(
+            index_elements=['user_id'],
+            set_={'last_digest_at': upsert.excluded.last_digest_at}
+        ))
+        db.session.commit()
+    return sent
+
+
+def instant_admin_emails(organization_id):
+    """Addresses of an organization's admins who asked for an email on every event."""
+    return [email for (email,) in db.session.query(User.email).join(
+        NotificationPreference, NotificationPreference.user_id == User.id
+    ).filter(
+        User.organization_id == organization_id,
+        User.role == 'admin',
+        NotificationPreference.email_mode == 'instant'
+    ).all()]
@@ -15,4 +15,25 @@ def send_email(to, subject, body):
         return True
     except Exception as e:
         print(f"Error sending email: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+def send_emails(messages):
+    """Send (to, subject, body) tuples over a single SMTP connection.
+
+    Returns the number of messages sent.
+    """
+    sent = 0
+    try:
+        with mail.connect() as connection:
+            for to, subject, body in messages:
+                msg = Message(
+                    subject,
+                    sender=current_app.config['MAIL_USERNAME'],
+                    recipients=[to]
+                )
+                msg.body = body
+                connection.send(msg)
+                sent += 1
+    except Exception as e:
+        print(f"Error sending email batch: {str(e)}")
+    return sent
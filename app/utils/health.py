@@ -0,0 +1,153 @@
+# app/utils/health.py
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.utils.cache import TTLCache
+
+health_cache = TTLCache(ttl=1, maxsize=4)
+STARTED_AT = time.monotonic()
+
+# Checks run here so a probe can give up on a database that does not answer
+# (an unreachable host blocks in connect, where statement_timeout cannot help)
+_checks = ThreadPoolExecutor(max_workers=8, thread_name_prefix='readiness')
+_inflight_lock = threading.Lock()
+# engine -> future of its running check; a hung check is waited on again by
+# later probes instead of piling up another thread behind it
+_inflight = {}
+
+# Capped so a huge backlog cannot make the probe itself slow
+BACKLOG_SQL = db.text("""
+    SELECT
+        (SELECT count(*) FROM (
+            SELECT 1 FROM emailoutbox
+            WHERE sent_at IS NULL AND attempts < :max_attempts
+            LIMIT :cap
+        ) unsent) AS queued,
+        (SELECT min(created_at) FROM emailoutbox
+         WHERE sent_at IS NULL AND attempts < :max_attempts) AS oldest
+""")
+
+
+def pool_status(engine):
+    pool = engine.pool
+    if not hasattr(pool, 'checkedout'):
+        # NullPool / StaticPool: nothing to saturate
+        return {'capacity': None, 'saturation': None}
+    # QueuePool has no public accessor for max_overflow; -1 means unlimited
+    max_overflow = getattr(pool, '_max_overflow', 0)
+    capacity = pool.size() + max_overflow if max_overflow >= 0 else None
+    checked_out = pool.checkedout()
+    return {
+        'size': pool.size(),
+        'checked_out': checked_out,
+        'checked_in': pool.checkedin(),
+        'overflow': max(pool.overflow(), 0),
+        'capacity': capacity,
+        'saturation': round(checked_out / capacity, 2) if capacity else None
+    }
+
+
+def _mail_queue(connection):
+    # In a savepoint: a database without the outbox (or a slow count) is
+    # reported here and does not make the database itself not ready
+    try:
+        with connection.begin_nested():
+            row = connection.execute(BACKLOG_SQL, {
+                'max_attempts': current_app.config.get('OUTBOX_MAX_ATTEMPTS', 5),
+                'cap': current_app.config.get('HEALTH_BACKLOG_CAP', 10000)
+            }).one()
+    except Exception as e:
+        return {'error': str(e).splitlines()[0]}
+    oldest = row.oldest.replace(tzinfo=None) if row.oldest else None
+    return {
+        'queued': row.queued,
+        'oldest_age_seconds': int((datetime.utcnow() - oldest).total_seconds()) if oldest else 0
+    }
+
+
+def _check_database(engine, timeout_ms, with_backlog):
+    status = {'pool': pool_status(engine)}
+    if status['pool']['capacity'] and status['pool']['checked_out'] >= status['pool']['capacity']:
+        # A checkout would block for pool_timeout; that alone means not ready
+        status.update(ok=False, error='Connection pool exhausted')
+        return status
+
+    started = time.monotonic()
+    try:
+        with engine.connect() as connection:
+            with connection.begin():
+                connection.execute(db.text(f'SET LOCAL statement_timeout = {int(timeout_ms)}'))
+                connection.execute(db.text('SELECT 1'))
+                if with_backlog:
+                    status['mail_queue'] = _mail_queue(connection)
+        status['ok'] = True
+    except Exception as e:
+        status.update(ok=False, error=str(e).splitlines()[0])
+    status['latency_ms'] = round((time.monotonic() - started) * 1000, 1)
+    return status
+
+
+def _run_check(app, engine, timeout_ms):
+    with app.app_context():
+        return _check_database(engine, timeout_ms, with_backlog=True)
+
+
+def _start_check(engine, timeout_ms):
+    app = current_app._get_current_object()
+    with _inflight_lock:
+        future = _inflight.get(engine)
+        if future is None or future.done():
+            future = _inflight[engine] = _checks.submit(_run_check, app, engine, timeout_ms)
+    return future
+
+
+def _compute_readiness():
+    config = current_app.config
+    timeout_ms = config.get('HEALTH_DB_TIMEOUT_MS', 1000)
+    deadline = time.monotonic() + timeout_ms / 1000
+    futures = {
+        bind_key or 'default': (engine, _start_check(engine, timeout_ms))
+        for bind_key, engine in db.engines.items()
+    }
+    databases = {}
+    for name, (engine, future) in futures.items():
+        try:
+            databases[name] = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except FutureTimeout:
+            databases[name] = {'ok': False, 'pool': pool_status(engine),
+                               'error': f'No answer within {timeout_ms} ms'}
+
+    ready = all(database['ok'] for database in databases.values())
+    warnings = []
+    max_age = config.get('HEALTH_MAIL_BACKLOG_MAX_AGE_SECONDS', 900)
+    for name, database in databases.items():
+        if 'error' in database.get('mail_queue', {}):
+            warnings.append(f'{name}: mail backlog unavailable')
+        elif database.get('mail_queue', {}).get('oldest_age_seconds', 0) > max_age:
+            warnings.append(f'{name}: outgoing mail is backed up')
+        if (database['pool']['saturation'] or 0) >= config.get('HEALTH_POOL_WARN_SATURATION', 0.9):
+            warnings.append(f'{name}: connection pool nearly exhausted')
+
+    return {
+        'status': 'ready' if ready else 'unavailable',
+        'databases': databases,
+        'warnings': warnings,
+        'checked_at': datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def get_readiness():
+    """Shared by every probe in the same second, so probe storms cost one check."""
+    return health_cache.get_or_set(
+        'readyz', _compute_readiness, ttl=current_app.config.get('HEALTH_CACHE_SECONDS', 1)
+    )
+
+
+def get_liveness():
+    return {
+        'status': 'ok',
+        'uptime_seconds': int(time.monotonic() - STARTED_AT)
+    }
@@ -0,0 +1,115 @@
+# app/utils/idempotency.py
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import jsonify, request, current_app, make_response
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import db
+from app.models.models import IdempotencyKey
+
+
+def _fingerprint():
+    digest = hashlib.sha256()
+    digest.update(request.method.encode('utf-8'))
+    digest.update(request.path.encode('utf-8'))
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _replay(record):
+    response = jsonify(record.response_body)
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response, record.status_code
+
+
+def _reserve(user_id, key, fingerprint):
+    """Claim the key for this attempt; returns the new row id or None if taken."""
+    now = datetime.utcnow()
+    ttl = timedelta(hours=current_app.config.get('IDEMPOTENCY_TTL_HOURS', 24))
+
+    # An expired record no longer protects anything; let the key be reused
+    IdempotencyKey.query.filter(
+        IdempotencyKey.user_id == user_id,
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at <= now
+    ).delete(synchronize_session=False)
+
+    reserved = db.session.execute(
+        pg_insert(IdempotencyKey).values(
+            user_id=user_id,
+            key=key,
+            method=request.method,
+            path=request.path,
+            request_hash=fingerprint,
+            created_at=now,
+            expires_at=now + ttl
+        ).on_conflict_do_nothing(constraint='uq_idempotencykeys_user_key').returning(IdempotencyKey.id)
+    ).scalar()
+    db.session.commit()
+    return reserved
+
+
+def idempotent(f):
+    """Replay the stored response when a request repeats its Idempotency-Key.
+
+    The first attempt reserves the key before running the view, so a retry that
+    arrives while it is still running gets 409 instead of doing the work twice.
+    Server errors release the key so the client can try again.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({'error': 'Idempotency-Key must be at most 255 characters'}), 400
+
+        user_id = int(get_jwt_identity())
+        fingerprint = _fingerprint()
+
+        record = IdempotencyKey.query.filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at > datetime.utcnow()
+        ).first()
+        if record:
+            if record.request_hash != fingerprint:
+                return jsonify({'error': 'Idempotency-Key was already used for a different request'}), 422
+            if record.status_code is None:
+                return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+            return _replay(record)
+
+        reserved_id = _reserve(user_id, key, fingerprint)
+        if reserved_id is None:
+            return jsonify({'error': 'A request with this Idempotency-Key is still in progress'}), 409
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            IdempotencyKey.query.filter_by(id=reserved_id).delete(synchronize_session=False)
+            db.session.commit()
+            raise
+
+        # Views that bail out early leave uncommitted changes behind; never let
+        # the bookkeeping commit below persist them.
+        db.session.rollback()
+        if response.status_code >= 500 or not response.is_json:
+            IdempotencyKey.query.filter_by(id=reserved_id).delete(synchronize_session=False)
+        else:
+            IdempotencyKey.query.filter_by(id=reserved_id).update({
+                'status_code': response.status_code,
+                'response_body': response.get_json()
+            }, synchronize_session=False)
+        db.session.commit()
+        return response
+    return decorated_function
+
+
+def purge_expired_keys():
+    deleted = IdempotencyKey.query.filter(
+        IdempotencyKey.expires_at <= datetime.utcnow()
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
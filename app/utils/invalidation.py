@@ -0,0 +1,205 @@
+# app/utils/invalidation.py
+"""Cross-worker cache invalidation.
+
+Writers call invalidate_after_commit(cache_name, key). When the session
+commits, the queued keys are dropped from this process's caches at once and
+broadcast to every other worker, on every host, through Postgres
+LISTEN/NOTIFY. A rollback discards them. Caches register under a name with
+the bus; anything with an invalidate(key=None) method will do.
+
+INVALIDATION_BUS = 'local' keeps everything in-process (dev server, tests).
+gunicorn.conf.py switches the default to 'postgres' when it runs more than
+one worker.
+"""
+import json
+import os
+import queue
+import select
+import threading
+import time
+import uuid
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+CHANNEL = 'cache_invalidation'
+
+
+def _encode_key(key):
+    return list(key) if isinstance(key, tuple) else key
+
+
+def _decode_key(key):
+    return tuple(_decode_key(part) for part in key) if isinstance(key, list) else key
+
+
+class LocalBus:
+    """Delivers invalidations to caches in this process only."""
+
+    def __init__(self):
+        self._caches = {}
+
+    def register(self, name, cache):
+        self._caches[name] = cache
+
+    def deliver(self, name, key):
+        cache = self._caches.get(name)
+        if cache is not None:
+            cache.invalidate(key)
+
+    def deliver_all(self):
+        for cache in self._caches.values():
+            cache.invalidate()
+
+    def ensure_listening(self):
+        pass
+
+    def publish(self, messages):
+        for name, key in messages:
+            self.deliver(name, key)
+
+
+class PostgresBus(LocalBus):
+    """LocalBus plus NOTIFY to, and a LISTEN thread for, every other worker.
+
+    The listener and the publisher each run on their own thread and
+    autocommit connection, started lazily once per process (threads do not
+    survive fork). Committing threads only queue their messages, so a slow
+    or unreachable database never holds up a request. While the listener is
+    disconnected notifications are lost, so every registered cache is
+    cleared whenever it (re)connects.
+    """
+
+    def __init__(self, database_uri, logger):
+        super().__init__()
+        self.dsn = make_url(database_uri).set(drivername='postgresql').render_as_string(hide_password=False)
+        self.logger = logger
+        # Our own notifications come back too; they were already applied locally
+        self.origin = uuid.uuid4().hex
+        self._lock = threading.Lock()
+        self._pid = None
+        self._outbox = None
+
+    def ensure_listening(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.origin = uuid.uuid4().hex
+            self._outbox = queue.Queue()
+            threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+            threading.Thread(target=self._publish_loop, args=(self._outbox,),
+                             name='cache-invalidation-publisher', daemon=True).start()
+
+    def _connect(self):
+        import psycopg2
+        connection = psycopg2.connect(self.dsn)
+        connection.autocommit = True
+        return connection
+
+    def _listen(self):
+        delay = 1
+        while True:
+            connection = None
+            try:
+                connection = self._connect()
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                self.deliver_all()
+                delay = 1
+                while True:
+                    if select.select([connection], [], [], 5) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        self._handle(connection.notifies.pop(0).payload)
+            except Exception as e:
+                self.logger.warning(f"Cache invalidation listener reconnecting: {str(e)}")
+                time.sleep(delay)
+                delay = min(delay * 2, 30)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+    def _handle(self, payload):
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return
+        if message.get('origin') != self.origin:
+            self.deliver(message['cache'], _decode_key(message.get('key')))
+
+    def _publish_loop(self, outbox):
+        connection = None
+        while True:
+            payloads = [outbox.get()]
+            while not outbox.empty():
+                payloads.append(outbox.get_nowait())
+            try:
+                if connection is None or connection.closed:
+                    connection = self._connect()
+                with connection.cursor() as cursor:
+                    for payload in payloads:
+                        cursor.execute('SELECT pg_notify(%s, %s)', (CHANNEL, payload))
+            except Exception as e:
+                # Other workers fall back on the caches' TTLs
+                self.logger.error(f"Cache invalidation publish failed: {str(e)}")
+                if connection is not None:
+                    connection.close()
+                connection = None
+
+    def publish(self, messages):
+        super().publish(messages)
+        self.ensure_listening()
+        for name, key in messages:
+            self._outbox.put(json.dumps({'cache': name, 'key': _encode_key(key), 'origin': self.origin}))
+
+
+def get_bus():
+    return current_app.extensions['invalidation_bus']
+
+
+def invalidate_after_commit(cache_name, key=None):
+    """Queue an invalidation, applied and broadcast once the session commits.
+
+    key=None clears the whole cache.
+    """
+    from app import db
+    db.session.info.setdefault('pending_invalidations', set()).add((cache_name, key))
+
+
+def _publish_pending(session):
+    pending = session.info.pop('pending_invalidations', None)
+    if pending and has_app_context():
+        get_bus().publish(sorted(pending, key=repr))
+
+
+def _discard_pending(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('pending_invalidations', None)
+
+
+def init_invalidation(app):
+    if app.config.get('INVALIDATION_BUS') == 'postgres':
+        bus = PostgresBus(app.config['SQLALCHEMY_DATABASE_URI'], app.logger)
+        app.before_request(bus.ensure_listening)
+    else:
+        bus = LocalBus()
+    app.extensions['invalidation_bus'] = bus
+
+    from app.utils.blocklist import revocation_cache
+    from app.utils.dashboard import dashboard_cache
+    from app.utils.cache import TTLCache
+    bus.register('dashboard', dashboard_cache)
+    bus.register('revocations', revocation_cache)
+    bus.register('tenant_binds', app.extensions.setdefault('tenant_binds', TTLCache(ttl=60)))
+    # Leave types used to be read fresh on every call. Without a bus that
+    # reaches the other workers they stay that way (ttl=0 still coalesces
+    # concurrent misses)
+    leave_types_ttl = app.config.get('LEAVE_TYPES_CACHE_SECONDS', 300) if isinstance(bus, PostgresBus) else 0
+    bus.register('leave_types', app.extensions.setdefault('leave_types', TTLCache(ttl=leave_types_ttl)))
+
+    if not event.contains(Session, 'after_commit', _publish_pending):
+        event.listen(Session, 'after_commit', _publish_pending)
+        event.listen(Session, 'after_soft_rollback', _discard_pending)
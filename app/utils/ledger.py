@@ -0,0 +1,154 @@
+# app/utils/ledger.py
+from datetime import datetime
+from app import db
+from app.models.models import User, LeaveBalance, LeaveLedgerEntry, LeaveType
+from app.utils.projection import refresh_after_commit
+
+
+def append_entry(user_id, leave_type_id, delta, kind, leave_request_id=None,
+                 created_by=None, note=None):
+    """Record a credit (positive delta) or debit (negative delta). Does not commit."""
+    if kind not in LeaveLedgerEntry.KINDS:
+        raise ValueError(f'Unknown ledger entry kind: {kind}')
+    entry = LeaveLedgerEntry(
+        user_id=user_id,
+        leave_type_id=leave_type_id,
+        leave_request_id=leave_request_id,
+        kind=kind,
+        delta=delta,
+        created_by=created_by,
+        note=note
+    )
+    db.session.add(entry)
+    return entry
+
+
+def _balances_query(user_id, leave_type_id=None, since=None):
+    # Snapshot FULL JOIN uncompacted deltas, in one statement so a concurrent
+    # compaction is seen either entirely before or entirely after.
+    snapshots = db.select(
+        LeaveBalance.id, LeaveBalance.user_id, LeaveBalance.leave_type_id,
+        LeaveBalance.balance, LeaveBalance.updated_at
+    ).where(LeaveBalance.user_id == user_id)
+    deltas = db.select(
+        LeaveLedgerEntry.leave_type_id,
+        db.func.sum(LeaveLedgerEntry.delta).label('delta'),
+        db.func.max(LeaveLedgerEntry.created_at).label('last_entry_at')
+    ).where(
+        LeaveLedgerEntry.user_id == user_id,
+        LeaveLedgerEntry.compacted.is_(False)
+    ).group_by(LeaveLedgerEntry.leave_type_id)
+
+    if leave_type_id is not None:
+        snapshots = snapshots.where(LeaveBalance.leave_type_id == leave_type_id)
+        deltas = deltas.where(LeaveLedgerEntry.leave_type_id == leave_type_id)
+
+    snapshots = snapshots.subquery()
+    deltas = deltas.subquery()
+    type_id = db.func.coalesce(snapshots.c.leave_type_id, deltas.c.leave_type_id)
+    updated_at = db.func.greatest(snapshots.c.updated_at, deltas.c.last_entry_at)
+
+    query = db.select(
+        snapshots.c.id,
+        type_id.label('leave_type_id'),
+        LeaveType.name.label('leave_type_name'),
+        (db.func.coalesce(snapshots.c.balance, 0) + db.func.coalesce(deltas.c.delta, 0)).label('balance'),
+        updated_at.label('updated_at')
+    ).select_from(
+        snapshots.join(deltas, snapshots.c.leave_type_id == deltas.c.leave_type_id, full=True)
+    ).join(LeaveType, LeaveType.id == type_id)
+
+    if since is not None:
+        query = query.where(updated_at > since)
+    return query
+
+
+def get_balances(user_id, since=None):
+    """Current balances for a user, shaped like LeaveBalance.to_dict().
+
+    With since, only balances whose snapshot or ledger changed after it.
+    """
+    rows = db.session.execute(_balances_query(user_id, since=since)).all()
+    return [{
+        'id': row.id,
+        'user_id': int(user_id),
+        'leave_type_id': row.leave_type_id,
+        'leave_type_name': row.leave_type_name,
+        'balance': row.balance,
+        'updated_at': row.updated_at.strftime('%Y-%m-%d %H:%M:%S') if row.updated_at else None
+    } for row in rows]
+
+
+def get_balance(user_id, leave_type_id):
+    """Current balance for one leave type, or None if the user never had one."""
+    row = db.session.execute(_balances_query(user_id, leave_type_id)).first()
+    return row.balance if row else None
+
+
+def lock_balance(user_id, leave_type_id):
+    """Serialise absolute adjustments for one user/type until the transaction ends."""
+    db.session.execute(
+        db.text('SELECT pg_advisory_xact_lock(:user_id, :leave_type_id)'),
+        {'user_id': int(user_id), 'leave_type_id': int(leave_type_id)}
+    )
+
+
+def request_net_delta(leave_request_id):
+    """Sum of ledger entries already booked against a leave request."""
+    return db.session.query(
+        db.func.coalesce(db.func.sum(LeaveLedgerEntry.delta), 0)
+    ).filter(LeaveLedgerEntry.leave_request_id == leave_request_id).scalar()
+
+
+def compact_ledger():
+    """Fold uncompacted entries into the LeaveBalance snapshots.
+
+    Marking entries and updating snapshots happen in one statement, so rows from
+    transactions still in flight are simply left for the next run.
+    Returns the number of user/type snapshots touched.
+    """
+    touched = db.session.execute(db.text("""
+        WITH folded AS (
+            UPDATE leaveledger SET compacted = true
+            WHERE NOT compacted
+            RETURNING user_id, leave_type_id, delta
+        )
+        INSERT INTO leavebalances (user_id, leave_type_id, balance, updated_at)
+        SELECT user_id, leave_type_id, SUM(delta), :now
+        FROM folded
+        GROUP BY user_id, leave_type_id
+        ON CONFLICT ON CONSTRAINT uq_leavebalances_user_type DO UPDATE
+        SET balance = leavebalances.balance + EXCLUDED.balance,
+            updated_at = EXCLUDED.updated_at
+    """), {'now': datetime.utcnow()}).rowcount
+    db.session.commit()
+    return touched
+
+
+def accrue_default_allocations(note=None):
+    """Credit every approved employee with each balance-tracked type's default allocation.
+
+    Runs from the CLI with no tenant set, so users are paired only with the
+    leave types of their own organization.
+    """
+    pairs = db.select(
+        User.id, LeaveType.id, db.literal('accrual'), LeaveType.default_allocation,
+        db.literal(note, db.String), db.literal(datetime.utcnow(), db.DateTime),
+        db.literal(False)
+    ).join(
+        LeaveType, LeaveType.organization_id == User.organization_id
+    ).where(
+        User.is_approved.is_(True),
+        User.role == 'employee',
+        LeaveType.requires_balance.is_(True),
+        LeaveType.default_allocation.isnot(None)
+    )
+    # One INSERT ... SELECT instead of a row per user and type from Python
+    user_ids = db.session.execute(
+        db.insert(LeaveLedgerEntry).from_select(
+            ['user_id', 'leave_type_id', 'kind', 'delta', 'note', 'created_at', 'compacted'], pairs
+        ).returning(LeaveLedgerEntry.user_id)
+    ).scalars().all()
+    refresh_after_commit(user_ids)
+    db.session.commit()
+    return len(user_ids)
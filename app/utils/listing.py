@@ -0,0 +1,63 @@
+# app/utils/listing.py
+"""Read-only list queries that skip ORM hydration.
+
+Each function selects only the columns its endpoint returns, formats dates
+in SQL, and hands back plain dicts shaped exactly like the model's
+to_dict(). No identity map, no instance state, no lazy loads. The
+statements are still ORM-enabled selects, so tenant scoping applies.
+"""
+from app import db
+from app.models.models import User, LeaveType, LeaveRequest
+
+DATETIME_FORMAT = 'YYYY-MM-DD HH24:MI:SS'
+DATE_FORMAT = 'YYYY-MM-DD'
+
+
+def _datetime(column):
+    return db.func.to_char(column, DATETIME_FORMAT)
+
+
+def _date(column):
+    return db.func.to_char(column, DATE_FORMAT)
+
+
+USER_COLUMNS = (
+    User.id,
+    User.username,
+    User.email,
+    User.role,
+    User.is_approved,
+    User.team,
+    _datetime(User.created_at).label('created_at'),
+)
+
+LEAVE_REQUEST_COLUMNS = (
+    LeaveRequest.id,
+    LeaveRequest.user_id,
+    LeaveRequest.leave_type_id,
+    LeaveType.name.label('leave_type_name'),
+    _date(LeaveRequest.start_date).label('start_date'),
+    _date(LeaveRequest.end_date).label('end_date'),
+    LeaveRequest.status,
+    LeaveRequest.reason,
+    _datetime(LeaveRequest.created_at).label('created_at'),
+    _datetime(LeaveRequest.updated_at).label('updated_at'),
+)
+
+
+def _rows(statement):
+    return [dict(row) for row in db.session.execute(statement).mappings()]
+
+
+def list_users(*criteria):
+    """Same shape as User.to_dict()."""
+    return _rows(db.select(*USER_COLUMNS).where(*criteria))
+
+
+def list_leave_requests(*criteria):
+    """Same shape as LeaveRequest.to_dict()."""
+    return _rows(
+        db.select(*LEAVE_REQUEST_COLUMNS).join(
+            LeaveType, LeaveType.id == LeaveRequest.leave_type_id
+        ).where(*criteria)
+    )
@@ -0,0 +1,55 @@
+# app/utils/outbox.py
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.models.models import OutboxEmail
+from app.utils.email import send_emails
+
+
+def queue_emails(messages):
+    """Queue (to, subject, body) tuples in one multi-row INSERT. Does not commit.
+
+    The rows commit or roll back with the change that produced them, so an
+    email is never sent for work that did not happen.
+    """
+    rows = [{'recipient': to, 'subject': subject, 'body': body} for to, subject, body in messages]
+    if rows:
+        db.session.execute(db.insert(OutboxEmail), rows)
+    return len(rows)
+
+
+def send_queued_emails(batch_size=None, max_attempts=None):
+    """Send the backlog in batches over one SMTP connection each.
+
+    Batches are claimed with SKIP LOCKED, so several senders can run at once.
+    Returns the number of emails sent.
+    """
+    batch_size = batch_size or current_app.config.get('OUTBOX_BATCH_SIZE', 100)
+    max_attempts = max_attempts or current_app.config.get('OUTBOX_MAX_ATTEMPTS', 5)
+    total = 0
+
+    while True:
+        batch = OutboxEmail.query.filter(
+            OutboxEmail.sent_at.is_(None),
+            OutboxEmail.attempts < max_attempts
+        ).order_by(OutboxEmail.created_at, OutboxEmail.id).limit(batch_size).with_for_update(
+            skip_locked=True
+        ).all()
+        if not batch:
+            return total
+
+        # send_emails stops at the first failure; everything before it went out
+        sent = send_emails([(email.recipient, email.subject, email.body) for email in batch])
+        now = datetime.utcnow()
+        for email in batch[:sent]:
+            email.sent_at = now
+            email.attempts += 1
+        for email in batch[sent:]:
+            email.attempts += 1
+            email.last_error = 'Delivery failed'
+        db.session.commit()
+
+        total += sent
+        if sent < len(batch):
+            return total
+
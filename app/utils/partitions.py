@@ -0,0 +1,140 @@
+# app/utils/partitions.py
+import re
+from datetime import date, datetime
+from app import db
+from app.utils.sync import record_partition_tombstones
+
+# Parent table -> partition granularity. Partitions are named
+# <table>_y2025 (yearly) or <table>_y2025m03 (monthly).
+PARTITIONED_TABLES = {
+    'leaverequests': 'yearly',
+    'notifications': 'monthly',
+}
+
+_NAME_PATTERN = re.compile(r'_y(\d{4})(?:m(\d{2}))?$')
+
+
+def _shift(start, period, steps):
+    if period == 'yearly':
+        return date(start.year + steps, 1, 1)
+    month_index = start.year * 12 + (start.month - 1) + steps
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _period_start(day, period):
+    return date(day.year, 1, 1) if period == 'yearly' else date(day.year, day.month, 1)
+
+
+def _partition_name(table, start, period):
+    if period == 'yearly':
+        return f'{table}_y{start.year}'
+    return f'{table}_y{start.year}m{start.month:02d}'
+
+
+def list_partitions(table):
+    return db.session.execute(db.text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+        ORDER BY child.relname
+    """), {'table': table}).scalars().all()
+
+
+def _default_partition(table):
+    return db.session.execute(db.text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table AND pg_get_expr(child.relpartbound, child.oid) = 'DEFAULT'
+    """), {'table': table}).scalar()
+
+
+def _columns(table):
+    return db.session.execute(db.text("""
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = CAST(:table AS regclass) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+    """), {'table': table}).scalars().all()
+
+
+def _create_partition(table, name, start, end):
+    bounds = f"FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+    default = _default_partition(table)
+    in_range = (f"created_at >= '{start.isoformat()} 00:00:00+00' "
+                f"AND created_at < '{end.isoformat()} 00:00:00+00'")
+    stranded = default and db.session.execute(db.text(
+        f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})'
+    )).scalar()
+    if not stranded:
+        db.session.execute(db.text(f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}'))
+        return 0
+
+    # A missed run left rows for this period in the default partition, and
+    # Postgres refuses a new partition overlapping them. Take the default out,
+    # create the partition, move the rows through the parent and put it back.
+    columns = ', '.join(_columns(table))
+    db.session.execute(db.text(f'ALTER TABLE {table} DETACH PARTITION {default}'))
+    db.session.execute(db.text(f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES {bounds}'))
+    moved = db.session.execute(db.text(f"""
+        WITH moved AS (DELETE FROM {default} WHERE {in_range} RETURNING {columns})
+        INSERT INTO {table} ({columns}) SELECT {columns} FROM moved
+    """)).rowcount
+    db.session.execute(db.text(f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT'))
+    return moved
+
+
+def create_future_partitions(table, ahead):
+    """Make sure partitions exist from the current period through `ahead` periods out.
+
+    Rows already sitting in the default partition for a new period are moved
+    into it, in the same transaction. Returns [(partition name, rows moved)].
+    """
+    period = PARTITIONED_TABLES[table]
+    current = _period_start(datetime.utcnow().date(), period)
+    created = []
+    for step in range(ahead + 1):
+        start = _shift(current, period, step)
+        end = _shift(start, period, 1)
+        name = _partition_name(table, start, period)
+        if db.session.execute(db.text('SELECT to_regclass(:name)'), {'name': name}).scalar():
+            continue
+        created.append((name, _create_partition(table, name, start, end)))
+    db.session.commit()
+    return created
+
+
+def retire_old_partitions(table, keep, archive_schema=None):
+    """Detach partitions whose whole range ended more than `keep` periods ago.
+
+    Detached partitions are moved to `archive_schema` when given, otherwise dropped.
+    Detaching is a catalog change, so old data leaves the hot indexes without a DELETE.
+    Rows of synced tables are tombstoned first, in the same transaction.
+    """
+    period = PARTITIONED_TABLES[table]
+    cutoff = _shift(_period_start(datetime.utcnow().date(), period), period, -keep)
+    retired = []
+
+    if archive_schema:
+        db.session.execute(db.text(f'CREATE SCHEMA IF NOT EXISTS {archive_schema}'))
+
+    for name in list_partitions(table):
+        match = _NAME_PATTERN.search(name)
+        if not match:
+            continue  # default partition or something hand-made
+        year, month = int(match.group(1)), int(match.group(2) or 1)
+        if _shift(date(year, month, 1), period, 1) > cutoff:
+            continue
+
+        record_partition_tombstones(table, name)
+        db.session.execute(db.text(f'ALTER TABLE {table} DETACH PARTITION {name}'))
+        if archive_schema:
+            db.session.execute(db.text(f'ALTER TABLE {name} SET SCHEMA {archive_schema}'))
+        else:
+            db.session.execute(db.text(f'DROP TABLE {name}'))
+        retired.append(name)
+
+    db.session.commit()
+    return retired
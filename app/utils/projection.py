@@ -0,0 +1,121 @@
+# app/utils/projection.py
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.models import LeaveRequest, LeaveLedgerEntry, LeaveBalance, Notification, EmployeeSummary
+
+# Rows of these models feed the summary; all carry a user_id
+SOURCE_MODELS = (LeaveRequest, LeaveLedgerEntry, LeaveBalance, Notification)
+
+REFRESH_SQL = db.text("""
+    INSERT INTO employeesummaries (user_id, balances, pending_count, next_leave, unread_count, updated_at)
+    SELECT
+        u.id,
+        coalesce((
+            SELECT json_agg(json_build_object(
+                       'leave_type_id', b.leave_type_id,
+                       'leave_type_name', lt.name,
+                       'balance', b.balance) ORDER BY lt.name)
+            FROM (
+                SELECT leave_type_id,
+                       coalesce(s.balance, 0) + coalesce(d.delta, 0) AS balance
+                FROM (SELECT leave_type_id, balance FROM leavebalances WHERE user_id = u.id) s
+                FULL JOIN (
+                    SELECT leave_type_id, sum(delta) AS delta
+                    FROM leaveledger
+                    WHERE user_id = u.id AND NOT compacted
+                    GROUP BY leave_type_id
+                ) d USING (leave_type_id)
+            ) b
+            JOIN leavetypes lt ON lt.id = b.leave_type_id
+        ), '[]'::json),
+        (SELECT count(*) FROM leaverequests WHERE user_id = u.id AND status = 'pending'),
+        (
+            SELECT json_build_object(
+                'id', lr.id,
+                'leave_type_id', lr.leave_type_id,
+                'leave_type_name', lt.name,
+                'start_date', to_char(lr.start_date, 'YYYY-MM-DD'),
+                'end_date', to_char(lr.end_date, 'YYYY-MM-DD'))
+            FROM leaverequests lr
+            JOIN leavetypes lt ON lt.id = lr.leave_type_id
+            WHERE lr.user_id = u.id AND lr.status = 'approved' AND lr.end_date >= CURRENT_DATE
+            ORDER BY lr.start_date
+            LIMIT 1
+        ),
+        (SELECT count(*) FROM notifications WHERE user_id = u.id AND NOT is_read),
+        now()
+    FROM users u
+    WHERE u.id = ANY(:user_ids)
+    ON CONFLICT (user_id) DO UPDATE SET
+        balances = EXCLUDED.balances,
+        pending_count = EXCLUDED.pending_count,
+        next_leave = EXCLUDED.next_leave,
+        unread_count = EXCLUDED.unread_count,
+        updated_at = EXCLUDED.updated_at
+""")
+
+
+def refresh_summaries(user_ids, connection=None):
+    """Rebuild the summary rows of the given users inside the current transaction.
+
+    A per-user advisory lock serialises concurrent writers, so the second one
+    recomputes only after the first has committed and never overwrites it with
+    a stale result.
+    """
+    user_ids = sorted({int(user_id) for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return
+    execute = connection.execute if connection is not None else db.session.execute
+    for user_id in user_ids:
+        execute(db.text('SELECT pg_advisory_xact_lock(:key)'), {'key': user_id})
+    execute(REFRESH_SQL, {'user_ids': user_ids})
+
+
+def refresh_after_commit(user_ids):
+    """Queue summary refreshes for paths that bypass the ORM flush (Core inserts)."""
+    db.session.info.setdefault('stale_summaries', set()).update(
+        int(user_id) for user_id in user_ids if user_id is not None
+    )
+
+
+def _affected_users(session):
+    user_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, SOURCE_MODELS):
+            user_ids.add(obj.user_id)
+    return user_ids
+
+
+def _after_flush(session, flush_context):
+    # Only remember who changed. Refreshing here would hold the per-user lock
+    # and the summary row for the rest of the writer's transaction
+    user_ids = _affected_users(session)
+    if user_ids:
+        session.info.setdefault('stale_summaries', set()).update(user_ids)
+
+
+def _after_commit(session):
+    user_ids = session.info.pop('stale_summaries', None)
+    if not user_ids or not has_app_context():
+        return
+    # A short transaction of its own that starts after the commit, so it sees
+    # the change; a failure leaves the summary stale but the change stands
+    try:
+        with session.get_bind(EmployeeSummary.__mapper__).begin() as connection:
+            refresh_summaries(user_ids, connection)
+    except Exception as e:
+        current_app.logger.error(f"Summary refresh failed for users {sorted(user_ids)}: {str(e)}")
+
+
+def _after_soft_rollback(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('stale_summaries', None)
+
+
+def init_projection():
+    if not event.contains(Session, 'after_flush', _after_flush):
+        event.listen(Session, 'after_flush', _after_flush)
+        event.listen(Session, 'after_commit', _after_commit)
+        event.listen(Session, 'after_soft_rollback', _after_soft_rollback)
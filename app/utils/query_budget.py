@@ -0,0 +1,138 @@
+# app/utils/query_budget.py
+import atexit
+import threading
+from collections import Counter
+from functools import wraps
+from flask import g, request, current_app, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised in 'raise' mode when an endpoint runs more statements than its budget."""
+
+
+def query_budget(max_queries):
+    """Declare how many SQL statements a whole request to this endpoint may run.
+
+    The count covers the request from start to finish, authentication and
+    tenant resolution included. It is only checked when QUERY_BUDGET_MODE is
+    set (see init_query_budget); otherwise the decorator is inert.
+
+    Put it directly under @route, above @jwt_required and @admin_required.
+    The budget is read from the registered view function, and it only
+    reaches that function from further down when every decorator in between
+    copies attributes with functools.wraps. Tests (tests/test_query_budget.py)
+    run every budgeted endpoint under TestingConfig, where budgets raise.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            return f(*args, **kwargs)
+        decorated_function.query_budget = max_queries
+        return decorated_function
+    return decorator
+
+
+class QueryStats:
+    """Per-endpoint statement counts collected while instrumentation is on."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, statements, budget):
+        repeated, repeats = Counter(statements).most_common(1)[0] if statements else (None, 0)
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, {
+                'endpoint': endpoint,
+                'budget': budget,
+                'requests': 0,
+                'total_queries': 0,
+                'max_queries': 0,
+                'over_budget': 0,
+                'most_repeated': None,
+                'most_repeated_count': 0
+            })
+            stats['requests'] += 1
+            stats['total_queries'] += len(statements)
+            stats['max_queries'] = max(stats['max_queries'], len(statements))
+            if budget is not None and len(statements) > budget:
+                stats['over_budget'] += 1
+            if repeats > stats['most_repeated_count']:
+                stats['most_repeated'], stats['most_repeated_count'] = repeated, repeats
+
+    def __bool__(self):
+        return bool(self._endpoints)
+
+    def worst_offenders(self, limit=10):
+        """Endpoints ordered by how far their worst request went past budget, then by size."""
+        with self._lock:
+            rows = [dict(stats) for stats in self._endpoints.values()]
+        for stats in rows:
+            stats['mean_queries'] = round(stats['total_queries'] / stats['requests'], 1)
+        return sorted(
+            rows,
+            key=lambda stats: (stats['max_queries'] - (stats['budget'] or stats['max_queries']),
+                               stats['max_queries']),
+            reverse=True
+        )[:limit]
+
+    def format_report(self, limit=10):
+        lines = ['SQL statements per request (worst offenders):']
+        for stats in self.worst_offenders(limit):
+            lines.append(
+                f"  {stats['endpoint']}: max {stats['max_queries']} / budget {stats['budget']}, "
+                f"mean {stats['mean_queries']} over {stats['requests']} requests, "
+                f"{stats['over_budget']} over budget"
+            )
+            if stats['most_repeated_count'] > 1:
+                statement = ' '.join(stats['most_repeated'].split())[:160]
+                lines.append(f"    repeated x{stats['most_repeated_count']}: {statement}")
+        return '\n'.join(lines)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'query_log' in g:
+        g.query_log.append(statement)
+
+
+def _start_counting():
+    g.query_log = []
+
+
+def _check_budget(response):
+    statements = g.pop('query_log', None)
+    if statements is None:
+        return response
+
+    view = current_app.view_functions.get(request.endpoint)
+    budget = getattr(view, 'query_budget', None)
+    if budget is None:
+        budget = current_app.config.get('QUERY_BUDGET_DEFAULT')
+    current_app.extensions['query_budget'].record(request.endpoint, statements, budget)
+
+    if budget is not None and len(statements) > budget:
+        message = f'{request.endpoint} ran {len(statements)} SQL statements (budget {budget})'
+        if current_app.config.get('QUERY_BUDGET_MODE') == 'raise':
+            raise QueryBudgetExceeded(message)
+        current_app.logger.warning(message)
+    response.headers['X-Query-Count'] = str(len(statements))
+    return response
+
+
+def init_query_budget(app):
+    """Count statements per request when QUERY_BUDGET_MODE is 'warn' or 'raise'."""
+    mode = app.config.get('QUERY_BUDGET_MODE')
+    if mode not in ('warn', 'raise'):
+        return
+
+    stats = app.extensions.setdefault('query_budget', QueryStats())
+    if not event.contains(Engine, 'before_cursor_execute', _count_statement):
+        event.listen(Engine, 'before_cursor_execute', _count_statement)
+    # Registered first so the count includes every other before_request hook
+    app.before_request_funcs.setdefault(None, []).insert(0, _start_counting)
+    app.after_request(_check_budget)
+
+    if app.config.get('QUERY_BUDGET_REPORT', True):
+        atexit.register(lambda: stats and app.logger.info(stats.format_report()))
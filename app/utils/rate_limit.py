@@ -0,0 +1,210 @@
+# app/utils/rate_limit.py
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import wraps
+from flask import jsonify, request, current_app
+
+PERIODS = {'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400}
+
+
+def parse_limit(limit):
+    """Turn '10/minute' into (capacity, refill rate in tokens per second)."""
+    count, period = limit.split('/')
+    count = int(count)
+    return count, count / PERIODS[period.strip()]
+
+
+def _take(tokens, updated_at, now, capacity, rate):
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+    if tokens >= 1:
+        return True, tokens - 1, 0.0
+    return False, tokens, (1 - tokens) / rate
+
+
+def _take_all(states, buckets, now):
+    """Take one token from every bucket, or from none of them.
+
+    states[i] is (tokens, updated_at) for buckets[i]. Returns (allowed,
+    retry_after, index of the first empty bucket or None, new tokens).
+    """
+    remaining = []
+    for index, ((tokens, updated_at), (_, capacity, rate)) in enumerate(zip(states, buckets)):
+        allowed, tokens, retry_after = _take(tokens, updated_at, now, capacity, rate)
+        if not allowed:
+            return False, retry_after, index, None
+        remaining.append(tokens)
+    return True, 0.0, None, remaining
+
+
+class LocalBackend:
+    """Token buckets held in this process only (dev server, tests, single worker)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def consume(self, buckets):
+        """buckets: [(key, capacity, rate)]; see _take_all for the result."""
+        now = time.time()
+        with self._lock:
+            states = [self._buckets.get(key, (capacity, now)) for key, capacity, _ in buckets]
+            allowed, retry_after, rejected, remaining = _take_all(states, buckets, now)
+            if allowed:
+                for (key, _, _), tokens in zip(buckets, remaining):
+                    self._buckets[key] = (tokens, now)
+            return allowed, retry_after, rejected
+
+
+class SharedMemoryBackend:
+    """Token buckets in a memory-mapped file shared by every worker on the host.
+
+    Buckets live in a fixed open-addressed table of (key hash, tokens, updated_at)
+    slots guarded by flock, so the memory footprint is bounded no matter how many
+    distinct IPs or usernames are seen. When every probed slot is taken the
+    least recently used one is recycled.
+    """
+
+    SLOT = struct.Struct('<Qdd')
+    PROBES = 8
+
+    def __init__(self, path, slots=65536):
+        self.path = path
+        self.slots = slots
+        self._thread_lock = threading.Lock()
+        self._pid = None
+        self._fd = None
+        self._map = None
+
+    def _open(self):
+        # flock is tied to the open file description, so a descriptor inherited
+        # across fork would not exclude the parent; reopen once per process.
+        if self._pid == os.getpid():
+            return
+        size = self.SLOT.size * self.slots
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(fd).st_size < size:
+            os.ftruncate(fd, size)
+        self._fd = fd
+        self._map = mmap.mmap(fd, size)
+        self._pid = os.getpid()
+
+    def _find_offset(self, key_hash, now, capacity, rate, claimed):
+        offsets = [((key_hash + probe) % self.slots) * self.SLOT.size for probe in range(self.PROBES)]
+        slots = [(offset, *self.SLOT.unpack_from(self._map, offset)) for offset in offsets]
+        # The key's own slot wins even if an earlier probe is free, otherwise a
+        # drained bucket would come back full
+        for offset, stored, _, _ in slots:
+            if stored == key_hash:
+                return offset
+
+        free = [slot for slot in slots if slot[0] not in claimed]
+        for offset, stored, _, updated_at in free:
+            # Empty, or idle long enough to have refilled completely
+            if stored == 0 or now - updated_at >= capacity / rate:
+                return offset
+        return min(free, key=lambda slot: slot[3])[0]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(
+            hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little'
+        ) or 1
+
+    def consume(self, buckets):
+        """buckets: [(key, capacity, rate)]; see _take_all for the result."""
+        with self._thread_lock:
+            self._open()
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = time.time()
+                slots, states = [], []
+                for key, capacity, rate in buckets:
+                    key_hash = self._hash(key)
+                    offset = self._find_offset(key_hash, now, capacity, rate, {offset for offset, _ in slots})
+                    stored, tokens, updated_at = self.SLOT.unpack_from(self._map, offset)
+                    if stored != key_hash:
+                        tokens, updated_at = capacity, now
+                    slots.append((offset, key_hash))
+                    states.append((tokens, updated_at))
+
+                allowed, retry_after, rejected, remaining = _take_all(states, buckets, now)
+                if allowed:
+                    for (offset, key_hash), tokens in zip(slots, remaining):
+                        self.SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+                return allowed, retry_after, rejected
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+
+def get_backend():
+    backend = current_app.extensions.get('rate_limit_backend')
+    if backend is None:
+        if current_app.config.get('RATE_LIMIT_BACKEND') == 'shared':
+            backend = SharedMemoryBackend(
+                current_app.config['RATE_LIMIT_SHARED_PATH'],
+                current_app.config.get('RATE_LIMIT_SHARED_SLOTS', 65536)
+            )
+        else:
+            backend = LocalBackend()
+        current_app.extensions['rate_limit_backend'] = backend
+    return backend
+
+
+def _client_ip():
+    return request.remote_addr or 'unknown'
+
+
+def _username():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return None
+    username = data.get('username')
+    return str(username).strip().lower() if username else None
+
+
+def check_rate_limit(scope):
+    """Charge the scope's buckets; a 429 response when one is empty, else None.
+
+    Limits come from RATE_LIMITS[scope], e.g. {'ip': '20/minute', 'username': '5/minute'}.
+    """
+    if not current_app.config.get('RATE_LIMIT_ENABLED', True):
+        return None
+
+    limits = current_app.config.get('RATE_LIMITS', {}).get(scope, {})
+    keys = {'ip': _client_ip, 'username': _username}
+
+    buckets = []
+    for dimension, limit in limits.items():
+        value = keys[dimension]()
+        if value is not None:
+            buckets.append((f'{scope}:{dimension}:{value}', *parse_limit(limit)))
+    if not buckets:
+        return None
+
+    # All or nothing: a request refused by one bucket costs the others nothing
+    allowed, retry_after, rejected = get_backend().consume(buckets)
+    if allowed:
+        return None
+    current_app.logger.warning(f"Rate limit hit for {buckets[rejected][0]}")
+    response = jsonify({'error': 'Too many requests, please try again later'})
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response, 429
+
+
+def rate_limited(scope):
+    """Reject with 429 before the view runs once any of the scope's buckets is empty."""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            rejection = check_rate_limit(scope)
+            if rejection is not None:
+                return rejection
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,108 @@
+# app/utils/sync.py
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import event
+from app import db
+from app.models.models import LeaveRequest, Tombstone
+from app.utils.listing import list_leave_requests
+
+CURSOR_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+# Tables whose deletions delta-sync clients are told about
+TOMBSTONED_TABLES = (LeaveRequest.__tablename__,)
+
+
+class CursorExpired(ValueError):
+    """The cursor predates the tombstones still kept; the client must resync in full."""
+
+
+def parse_since(value):
+    """Turn a ?since= cursor into a datetime. Raises ValueError or CursorExpired."""
+    since = datetime.fromisoformat(value)
+    if since.tzinfo is not None:
+        since = since.replace(tzinfo=None) - since.utcoffset()
+    retention = current_app.config.get('SYNC_TOMBSTONE_RETENTION_DAYS')
+    if retention and since < datetime.utcnow() - timedelta(days=retention):
+        raise CursorExpired(value)
+    return since
+
+
+def next_cursor():
+    """Cursor to hand back with a response.
+
+    updated_at is stamped at flush time, so a transaction still open when we
+    read may later commit rows older than "now". Backing the cursor off by
+    SYNC_CURSOR_LAG_SECONDS re-sends recent rows instead of missing those;
+    clients upsert by id, so repeats are harmless.
+    """
+    lag = current_app.config.get('SYNC_CURSOR_LAG_SECONDS', 10)
+    return (datetime.utcnow() - timedelta(seconds=lag)).strftime(CURSOR_FORMAT)
+
+
+def deleted_since(table_name, since, user_id=None, organization_id=None):
+    """Ids of rows of table_name deleted after since, for one user or organization."""
+    query = db.session.query(Tombstone.row_id).filter(
+        Tombstone.table_name == table_name,
+        Tombstone.deleted_at > since
+    )
+    if user_id is not None:
+        query = query.filter(Tombstone.user_id == int(user_id))
+    if organization_id is not None:
+        query = query.filter(Tombstone.organization_id == organization_id)
+    return [row_id for (row_id,) in query.all()]
+
+
+def leave_request_changes(since, *criteria, status=None):
+    """Split leave requests updated after since into (changed rows, removed ids).
+
+    With a status filter, rows that changed to another status are reported as
+    removed so the client drops them from that view.
+    """
+    changed, removed = [], []
+    for row in list_leave_requests(LeaveRequest.updated_at > since, *criteria):
+        if status and row['status'] != status:
+            removed.append(row['id'])
+        else:
+            changed.append(row)
+    return changed, removed
+
+
+def purge_tombstones():
+    retention = current_app.config.get('SYNC_TOMBSTONE_RETENTION_DAYS')
+    if not retention:
+        return 0
+    deleted = Tombstone.query.filter(
+        Tombstone.deleted_at <= datetime.utcnow() - timedelta(days=retention)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
+
+
+def record_partition_tombstones(table_name, partition):
+    """Tombstone every row of a partition that is about to be detached.
+
+    Retiring a partition removes its rows without a DELETE, so the
+    after_delete hook below never sees them.
+    """
+    if table_name not in TOMBSTONED_TABLES:
+        return 0
+    result = db.session.execute(db.text(f"""
+        INSERT INTO tombstones (table_name, row_id, organization_id, user_id, deleted_at)
+        SELECT :table_name, id, organization_id, user_id, :now FROM {partition}
+    """), {'table_name': table_name, 'now': datetime.utcnow()})
+    return result.rowcount
+
+
+def _record_tombstone(mapper, connection, target):
+    # Same connection as the DELETE, so the tombstone commits with it
+    connection.execute(db.insert(Tombstone).values(
+        table_name=mapper.local_table.name,
+        row_id=target.id,
+        organization_id=target.organization_id,
+        user_id=target.user_id,
+        deleted_at=datetime.utcnow()
+    ))
+
+
+def init_sync():
+    if not event.contains(LeaveRequest, 'after_delete', _record_tombstone):
+        event.listen(LeaveRequest, 'after_delete', _record_tombstone)
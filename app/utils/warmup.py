@@ -0,0 +1,50 @@
+# app/utils/warmup.py
+import time
+from app import db
+
+
+def warm_up(app):
+    """Do one-off work in the master so forked workers inherit it copy-on-write.
+
+    Imports lazily loaded modules, builds in-memory caches, then closes every
+    connection the warm-up opened so no socket is shared with the children.
+    """
+    started = time.monotonic()
+    with app.app_context():
+        # Modules otherwise imported on the first request
+        import hashlib  # noqa: F401
+        import werkzeug.security  # noqa: F401
+        from app.utils import bulk_import, rate_limit  # noqa: F401
+        from app.utils.blocklist import revocation_cache
+
+        try:
+            revocation_cache.refresh()
+        except Exception as e:
+            app.logger.warning(f"Warm-up could not preload caches: {str(e)}")
+        finally:
+            db.session.remove()
+            db.engine.dispose()
+
+    app.logger.info(f"Warm-up finished in {(time.monotonic() - started) * 1000:.1f} ms")
+
+
+def reset_after_fork(app):
+    """Drop pooled connections inherited from the parent without closing them.
+
+    close=False leaves the parent's sockets alone; the child just forgets them
+    and opens its own.
+    """
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def prefill_pool(app, size):
+    """Open `size` connections up front so the first requests skip the handshake."""
+    with app.app_context():
+        connections = []
+        try:
+            for _ in range(size):
+                connections.append(db.engine.connect())
+        finally:
+            for connection in connections:
+                connection.close()
@@ -0,0 +1,143 @@
+# benchmarks/forecast.py
+"""Time the workforce balance forecast (app.utils.forecast) for one organization.
+
+Seed a synthetic organization once, then time it:
+
+    python benchmarks/forecast.py --seed 50000
+    python benchmarks/forecast.py --organization <id printed by --seed> --repeat 5
+
+For each mode it reports the best wall time of forecast_balances(), the part
+of that spent in SQL, the time to serialize the result to JSON, and the
+full GET /admin/leave-balance/forecast through the test client.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import g  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.utils.forecast import forecast_balances  # noqa: E402
+
+SEED_SQL = [
+    """INSERT INTO users (username, email, password_hash, role, is_approved, created_at, organization_id)
+       SELECT 'bench' || n, 'bench' || n || '@example.com', 'x', 'employee', true, now(), :org
+       FROM generate_series(1, :employees) n""",
+    """INSERT INTO users (username, email, password_hash, role, is_approved, created_at, organization_id)
+       VALUES ('bench-admin', 'bench-admin@example.com', 'x', 'admin', true, now(), :org)""",
+    """INSERT INTO leavetypes (name, description, default_allocation, requires_balance, created_at, organization_id)
+       VALUES ('Annual', '', 25, true, now(), :org), ('Sick', '', 10, true, now(), :org),
+              ('Study', '', 5, true, now(), :org), ('Unpaid', '', NULL, false, now(), :org)""",
+    # A compacted snapshot for every user and type plus one uncompacted delta
+    """INSERT INTO leavebalances (user_id, leave_type_id, balance, updated_at)
+       SELECT u.id, lt.id, 20, now() FROM users u JOIN leavetypes lt USING (organization_id)
+       WHERE u.organization_id = :org AND u.role = 'employee' AND lt.requires_balance""",
+    """INSERT INTO leaveledger (user_id, leave_type_id, kind, delta, compacted, created_at)
+       SELECT u.id, lt.id, 'adjustment', -(u.id % 7)::int, false, now()
+       FROM users u JOIN leavetypes lt USING (organization_id)
+       WHERE u.organization_id = :org AND u.role = 'employee' AND lt.requires_balance""",
+    # One pending request for two users in three
+    """INSERT INTO leaverequests (organization_id, user_id, leave_type_id, start_date, end_date,
+                                  status, created_at, updated_at)
+       SELECT :org, u.id, (SELECT min(id) FROM leavetypes WHERE organization_id = :org),
+              CURRENT_DATE + 30, CURRENT_DATE + 30 + (u.id % 10)::int, 'pending', now(), now()
+       FROM users u WHERE u.organization_id = :org AND u.role = 'employee' AND u.id % 3 <> 0""",
+]
+
+
+def seed(app, employees):
+    with app.app_context():
+        organization_id = db.session.execute(db.text(
+            "INSERT INTO organizations (name, slug, created_at) VALUES (:name, :slug, now()) RETURNING id"
+        ), {'name': f'Forecast benchmark ({employees})', 'slug': f'forecast-bench-{time.time_ns()}'}).scalar()
+        for statement in SEED_SQL:
+            db.session.execute(db.text(statement), {'org': organization_id, 'employees': employees})
+        db.session.commit()
+        db.session.execute(db.text('ANALYZE'))
+        db.session.commit()
+    return organization_id
+
+
+class SQLTimer:
+    def __init__(self, engine):
+        self.total = 0.0
+        event.listen(engine, 'before_cursor_execute', self._before)
+        event.listen(engine, 'after_cursor_execute', self._after)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info['query_started'] = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += time.perf_counter() - conn.info.pop('query_started')
+
+
+def best_of(repeat, fn):
+    """Best wall time and the result of that run."""
+    best, best_result = None, None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - started
+        if best is None or elapsed < best:
+            best, best_result = elapsed, result
+    return best, best_result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--organization', type=int)
+    parser.add_argument('--seed', type=int, metavar='EMPLOYEES',
+                        help='create an organization with this many employees and print its id')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    if args.seed:
+        print(f'Seeded organization {seed(app, args.seed)}')
+        return
+    if args.organization is None:
+        parser.error('--organization or --seed is required')
+
+    as_of = date(date.today().year + 1, 6, 30)
+    with app.app_context():
+        timer = SQLTimer(db.engine)
+        admin_id = db.session.execute(db.text(
+            "SELECT min(id) FROM users WHERE organization_id = :org AND role = 'admin'"
+        ), {'org': args.organization}).scalar()
+        headers = {'Authorization': 'Bearer ' + create_access_token(
+            identity=str(admin_id), additional_claims={'org': args.organization}
+        )}
+    client = app.test_client()
+
+    print(f"{'mode':<16}{'rows':>10}{'forecast ms':>13}{'sql ms':>8}{'json ms':>9}{'endpoint ms':>13}")
+    for label, include_pending, shortfall_only in (('full', True, False), ('no pending', False, False),
+                                                   ('shortfall only', True, True)):
+        with app.test_request_context():
+            g.organization_id = args.organization
+
+            def run():
+                timer.total = 0.0
+                result = forecast_balances(args.organization, as_of, include_pending, shortfall_only)
+                return result, timer.total
+
+            forecast_best, (result, sql_time) = best_of(args.repeat, run)
+            json_best, _ = best_of(args.repeat, lambda: json.dumps(result))
+            db.session.remove()
+
+        query = f"as_of={as_of}&include_pending={include_pending}&shortfall_only={shortfall_only}"
+        endpoint_best, response = best_of(
+            args.repeat, lambda: client.get(f'/admin/leave-balance/forecast?{query}', headers=headers)
+        )
+        assert response.status_code == 200, response.get_json()
+        print(f"{label:<16}{len(result['forecasts']):>10}{forecast_best * 1000:>13.0f}{sql_time * 1000:>8.0f}"
+              f"{json_best * 1000:>9.0f}{endpoint_best * 1000:>13.0f}")
+
+
+if __name__ == '__main__':
+    main()
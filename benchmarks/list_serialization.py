@@ -0,0 +1,76 @@
+# benchmarks/list_serialization.py
+"""Compare ORM hydration + to_dict() with the column projections in app.utils.listing.
+
+Run against a populated database:
+
+    python benchmarks/list_serialization.py --organization 1 --repeat 5
+
+For each list it reports rows, best wall time, time per row and the peak
+Python memory allocated while building the response payload.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import g  # noqa: E402
+from sqlalchemy.orm import joinedload  # noqa: E402
+from app import create_app, db  # noqa: E402
+from app.models.models import User, LeaveRequest  # noqa: E402
+from app.utils.listing import list_users, list_leave_requests  # noqa: E402
+
+
+def orm_users():
+    return [user.to_dict() for user in User.query.all()]
+
+
+def orm_leave_requests():
+    return [lr.to_dict() for lr in LeaveRequest.query.options(joinedload(LeaveRequest.leave_type)).all()]
+
+
+def measure(build, repeat):
+    best = None
+    rows = 0
+    for _ in range(repeat):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        rows = len(build())
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    # Memory on a separate pass, tracemalloc itself slows the run down
+    db.session.expunge_all()
+    tracemalloc.start()
+    payload = build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del payload
+    return rows, best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--organization', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.test_request_context():
+        g.organization_id = args.organization
+        cases = [
+            ('users', orm_users, list_users),
+            ('leave requests', orm_leave_requests, list_leave_requests),
+        ]
+        print(f"{'list':<16}{'path':<12}{'rows':>8}{'best ms':>10}{'us/row':>9}{'peak KiB':>10}")
+        for name, orm_path, projection_path in cases:
+            for label, build in (('to_dict', orm_path), ('projection', projection_path)):
+                rows, best, peak = measure(build, args.repeat)
+                per_row = best / rows * 1e6 if rows else 0
+                print(f'{name:<16}{label:<12}{rows:>8}{best * 1000:>10.1f}{per_row:>9.2f}{peak / 1024:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 # config.py
 from datetime import timedelta
+import json
 import os
 
 class Config:
@@ -18,6 +19,135 @@ class Config:
     )
     
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Dedicated databases for large organizations, e.g. {"acme": "postgresql://..."};
+    # an organization opts in by setting its database_key to one of these keys.
+    SQLALCHEMY_BINDS = json.loads(os.getenv('TENANT_DATABASE_URLS', '{}'))
+    # Organization used when a request names none (single-tenant installs)
+    DEFAULT_ORGANIZATION_ID = int(os.getenv('DEFAULT_ORGANIZATION_ID', '1'))
+    # Dotted path to a callable(organization_id) -> bind key, to replace the
+    # database_key lookup with custom routing
+    TENANT_BIND_RESOLVER = os.getenv('TENANT_BIND_RESOLVER')
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', '5')),
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', '10')),
+        'pool_pre_ping': True,
+        'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', '1800')),
+        # Seconds to wait for a new connection; libpq otherwise waits on TCP
+        # for minutes when the host is unreachable
+        'connect_args': {'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', '5'))},
+    }
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'jwt-secret-key')
-    JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
-    ADMIN_SECRET_KEY = os.getenv('ADMIN_SECRET_KEY', 'your-super-secret-admin-key')
\ No newline at end of file
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.getenv('JWT_ACCESS_TOKEN_MINUTES', '15')))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv('JWT_REFRESH_TOKEN_DAYS', '7')))
+    ADMIN_SECRET_KEY = os.getenv('ADMIN_SECRET_KEY', 'your-super-secret-admin-key')
+
+    # Token revocation: Bloom filter sizing and how often it is rebuilt from the DB
+    BLOCKLIST_BLOOM_CAPACITY = int(os.getenv('BLOCKLIST_BLOOM_CAPACITY', '100000'))
+    BLOCKLIST_BLOOM_ERROR_RATE = float(os.getenv('BLOCKLIST_BLOOM_ERROR_RATE', '0.001'))
+    BLOCKLIST_REFRESH_SECONDS = int(os.getenv('BLOCKLIST_REFRESH_SECONDS', '30'))
+
+    # Auth throttling: token buckets per client IP and per submitted username.
+    # 'shared' keeps buckets in a memory-mapped file so all workers on a host agree.
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'local')
+    RATE_LIMIT_SHARED_PATH = os.getenv('RATE_LIMIT_SHARED_PATH', '/dev/shm/leave-management-ratelimit')
+    # Reverse proxies in front of the app whose X-Forwarded-For / -Proto / -Host
+    # are trusted (1 behind a single load balancer). Leave at 0 when clients
+    # connect directly, or they could pick their own IP bucket.
+    TRUSTED_PROXY_HOPS = int(os.getenv('TRUSTED_PROXY_HOPS', '0'))
+    RATE_LIMITS = {
+        'login': {'ip': '20/minute', 'username': '5/minute'},
+        'register': {'ip': '5/minute'},
+        'register_admin': {'ip': '3/minute'},
+        # X-Organization slugs not yet cached, charged before the lookup query
+        'tenant_lookup': {'ip': '30/minute'},
+    }
+    # Seconds an X-Organization slug lookup, found or not, is reused. A new
+    # organization is reachable by slug within this window
+    ORGANIZATION_SLUG_CACHE_SECONDS = int(os.getenv('ORGANIZATION_SLUG_CACHE_SECONDS', '60'))
+
+    # Seconds the admin dashboard summary is shared between admins
+    DASHBOARD_CACHE_SECONDS = int(os.getenv('DASHBOARD_CACHE_SECONDS', '5'))
+
+    # How long a stored Idempotency-Key response can be replayed
+    IDEMPOTENCY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_TTL_HOURS', '24'))
+
+    # Lease an approver holds on requests handed out by /admin/leave-requests/claim
+    CLAIM_LEASE_SECONDS = int(os.getenv('CLAIM_LEASE_SECONDS', '300'))
+
+    # Partition maintenance: periods created ahead, and periods kept before a
+    # partition is detached (years for leave requests, months for notifications).
+    # None keeps everything. Retired partitions are moved to PARTITION_ARCHIVE_SCHEMA;
+    # set it to an empty string to drop them instead.
+    PARTITION_PRECREATE = {'leaverequests': 1, 'notifications': 3}
+    PARTITION_RETENTION = {
+        'leaverequests': int(os.getenv('LEAVE_REQUEST_RETENTION_YEARS', '0')) or None,
+        'notifications': int(os.getenv('NOTIFICATION_RETENTION_MONTHS', '12')) or None,
+    }
+    PARTITION_ARCHIVE_SCHEMA = os.getenv('PARTITION_ARCHIVE_SCHEMA', 'archive') or None
+
+    # Admin digest: look-back for admins who never received one, and how many
+    # usernames are listed before the rest are summarised
+    DIGEST_DEFAULT_WINDOW_HOURS = int(os.getenv('DIGEST_DEFAULT_WINDOW_HOURS', '24'))
+    DIGEST_SAMPLE_SIZE = int(os.getenv('DIGEST_SAMPLE_SIZE', '20'))
+
+    # Cache invalidation across workers: 'postgres' (LISTEN/NOTIFY) or 'local'
+    # (this process only; gunicorn.conf.py defaults to 'postgres' when it runs
+    # more than one worker). With 'postgres' the cache TTLs are only a
+    # fallback; with 'local' leave types are not cached at all.
+    INVALIDATION_BUS = os.getenv('INVALIDATION_BUS', 'local')
+    LEAVE_TYPES_CACHE_SECONDS = int(os.getenv('LEAVE_TYPES_CACHE_SECONDS', '300'))
+
+    # Balance forecasting: months whose 1st the accrual job (`flask ledger accrue`)
+    # is scheduled to run on, each crediting every type's default allocation
+    FORECAST_ACCRUAL_MONTHS = tuple(
+        int(month) for month in os.getenv('FORECAST_ACCRUAL_MONTHS', '1').split(',') if month.strip()
+    )
+
+    # Delta sync (?since=): how far cursors are backed off to cover in-flight
+    # transactions, and how long deletions are remembered (older cursors get 410)
+    SYNC_CURSOR_LAG_SECONDS = int(os.getenv('SYNC_CURSOR_LAG_SECONDS', '10'))
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+
+    # SQL statements per request: 'warn' logs and 'raise' fails requests that go
+    # over their @query_budget (or QUERY_BUDGET_DEFAULT); unset disables counting
+    QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE') or None
+    QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', '0')) or None
+    QUERY_BUDGET_REPORT = True
+
+    # Bulk user actions (/admin/users/bulk): explicit ids accepted per call.
+    # Their emails go through the outbox, sent in batches by `flask outbox send`.
+    BULK_USER_ACTION_LIMIT = int(os.getenv('BULK_USER_ACTION_LIMIT', '1000'))
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '100'))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+
+    # /readyz: deadline for each database to answer (connecting included), how
+    # long a result is shared between probes, and when to warn about pool
+    # saturation or a stuck outbox (readiness itself only depends on the
+    # databases answering)
+    HEALTH_DB_TIMEOUT_MS = int(os.getenv('HEALTH_DB_TIMEOUT_MS', '1000'))
+    HEALTH_CACHE_SECONDS = float(os.getenv('HEALTH_CACHE_SECONDS', '1'))
+    HEALTH_POOL_WARN_SATURATION = float(os.getenv('HEALTH_POOL_WARN_SATURATION', '0.9'))
+    HEALTH_MAIL_BACKLOG_MAX_AGE_SECONDS = int(os.getenv('HEALTH_MAIL_BACKLOG_MAX_AGE_SECONDS', '900'))
+
+    # /batch: sub-requests per call, and how many GETs run at once (each
+    # holds its own pooled connection while it runs)
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+    BATCH_MAX_CONCURRENCY = int(os.getenv('BATCH_MAX_CONCURRENCY', '4'))
+
+    # Bulk onboarding: threads used to hash passwords (defaults to CPU count)
+    BULK_IMPORT_HASH_WORKERS = int(os.getenv('BULK_IMPORT_HASH_WORKERS', '0')) or None
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'TEST_DATABASE_URL',
+        f'postgresql://{Config.DB_USER}:{Config.DB_PASSWORD}@{Config.DB_HOST}:{Config.DB_PORT}/leave_management_test'
+    )
+    SQLALCHEMY_BINDS = {}
+    RATE_LIMIT_ENABLED = False
+    DASHBOARD_CACHE_SECONDS = 0
+    QUERY_BUDGET_MODE = os.getenv('QUERY_BUDGET_MODE', 'raise')
+    QUERY_BUDGET_DEFAULT = int(os.getenv('QUERY_BUDGET_DEFAULT', '20'))
@@ -0,0 +1,72 @@
+# gunicorn.conf.py
+# Loaded automatically by `gunicorn wsgi:app`. Every setting can be overridden
+# through the environment so deployments don't need their own config file.
+import multiprocessing
+import os
+import time
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Each worker has its own caches; with more than one they must hear about
+# each other's invalidations. Read by config.py, which loads after this file.
+if workers > 1:
+    os.environ.setdefault('INVALIDATION_BUS', 'postgres')
+
+# 'gthread' (threaded, default) or 'gevent'
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+
+# Connections opened per worker before it accepts traffic
+prefill_connections = int(os.getenv('DB_POOL_PREFILL', '2'))
+
+if worker_class == 'gevent':
+    # Must run before the app (and psycopg2) is imported in preload mode
+    from gevent import monkey
+    monkey.patch_all()
+    try:
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+    except ImportError:
+        pass
+
+
+def when_ready(server):
+    if preload_app:
+        from wsgi import app
+        from app.utils.warmup import warm_up
+        warm_up(app)
+
+
+def pre_fork(server, worker):
+    # Stored on the worker object, which the child inherits
+    worker.boot_started_at = time.monotonic()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        from wsgi import app
+        from app.utils.warmup import reset_after_fork
+        reset_after_fork(app)
+
+
+def post_worker_init(worker):
+    from wsgi import app
+    from app.utils.warmup import prefill_pool
+
+    if prefill_connections:
+        try:
+            prefill_pool(app, prefill_connections)
+        except Exception as e:
+            worker.log.warning(f"Could not prefill DB pool: {str(e)}")
+
+    boot_ms = (time.monotonic() - worker.boot_started_at) * 1000
+    worker.log.info(f"Worker {worker.pid} booted in {boot_ms:.1f} ms ({worker_class})")
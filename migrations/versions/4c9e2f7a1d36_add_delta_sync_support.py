@@ -0,0 +1,60 @@
+"""add delta sync support
+
+Revision ID: 4c9e2f7a1d36
+Revises: a3e7d05b9c21
+Create Date: 2026-10-19 17:02:51.336418
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4c9e2f7a1d36'
+down_revision = 'a3e7d05b9c21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rows never updated so far have no updated_at; their creation is their last change
+    op.execute('UPDATE leaverequests SET updated_at = created_at WHERE updated_at IS NULL')
+    op.alter_column('leaverequests', 'updated_at',
+               existing_type=sa.DateTime(timezone=True),
+               nullable=False,
+               server_default=sa.text('now()'))
+
+    op.drop_index('ix_leaverequests_user_id', table_name='leaverequests')
+    op.create_index('ix_leaverequests_user_updated', 'leaverequests', ['user_id', 'updated_at'], unique=False)
+    op.create_index('ix_leaverequests_organization_updated', 'leaverequests',
+                    ['organization_id', 'updated_at'], unique=False)
+
+    op.create_table('tombstones',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('row_id', sa.BigInteger(), nullable=False),
+    sa.Column('organization_id', sa.BigInteger(), nullable=True),
+    sa.Column('user_id', sa.BigInteger(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['organization_id'], ['organizations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_tombstones_table_user_deleted', 'tombstones',
+                    ['table_name', 'user_id', 'deleted_at'], unique=False)
+    op.create_index('ix_tombstones_table_organization_deleted', 'tombstones',
+                    ['table_name', 'organization_id', 'deleted_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_tombstones_table_organization_deleted', table_name='tombstones')
+    op.drop_index('ix_tombstones_table_user_deleted', table_name='tombstones')
+    op.drop_table('tombstones')
+
+    op.drop_index('ix_leaverequests_organization_updated', table_name='leaverequests')
+    op.drop_index('ix_leaverequests_user_updated', table_name='leaverequests')
+    op.create_index('ix_leaverequests_user_id', 'leaverequests', ['user_id'], unique=False)
+
+    op.alter_column('leaverequests', 'updated_at',
+               existing_type=sa.DateTime(timezone=True),
+               nullable=True,
+               server_default=None)
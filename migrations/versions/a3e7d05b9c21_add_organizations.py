@@ -0,0 +1,77 @@
+"""add organizations
+
+Revision ID: a3e7d05b9c21
+Revises: 6f1b2c8d0e53
+Create Date: 2026-10-19 16:21:07.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3e7d05b9c21'
+down_revision = '6f1b2c8d0e53'
+branch_labels = None
+depends_on = None
+
+TENANT_TABLES = ('users', 'leavetypes', 'leaverequests')
+
+
+def upgrade():
+    op.create_table('organizations',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('slug', sa.String(), nullable=False),
+    sa.Column('database_key', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('slug')
+    )
+
+    # Existing data becomes the default organization (DEFAULT_ORGANIZATION_ID)
+    op.execute("INSERT INTO organizations (id, name, slug, created_at) VALUES (1, 'Default', 'default', now())")
+    op.execute("SELECT setval(pg_get_serial_sequence('organizations', 'id'), 1)")
+
+    for table in TENANT_TABLES:
+        op.add_column(table, sa.Column('organization_id', sa.BigInteger(), nullable=False, server_default='1'))
+        op.alter_column(table, 'organization_id', server_default=None)
+        op.create_foreign_key(f'{table}_organization_id_fkey', table, 'organizations', ['organization_id'], ['id'])
+
+    op.create_index('ix_users_organization_role', 'users', ['organization_id', 'role'], unique=False)
+    # Nothing stopped duplicate leave type names before; keep the oldest name
+    # and suffix later copies with their id rather than merging their history
+    op.execute("""
+        UPDATE leavetypes
+        SET name = leavetypes.name || ' (' || leavetypes.id || ')'
+        FROM (
+            SELECT id, row_number() OVER (PARTITION BY organization_id, name ORDER BY id) AS copy
+            FROM leavetypes
+        ) copies
+        WHERE copies.id = leavetypes.id AND copies.copy > 1
+    """)
+    op.create_unique_constraint('uq_leavetypes_organization_name', 'leavetypes', ['organization_id', 'name'])
+    op.create_index('ix_leaverequests_organization_status_created', 'leaverequests',
+                    ['organization_id', 'status', 'created_at'], unique=False)
+
+    op.add_column('tokenblocklist', sa.Column('organization_id', sa.BigInteger(), nullable=True))
+    op.execute('UPDATE tokenblocklist SET organization_id = 1')
+    op.create_foreign_key('tokenblocklist_organization_id_fkey', 'tokenblocklist', 'organizations',
+                          ['organization_id'], ['id'])
+    op.drop_constraint('tokenblocklist_user_id_fkey', 'tokenblocklist', type_='foreignkey')
+
+
+def downgrade():
+    op.create_foreign_key('tokenblocklist_user_id_fkey', 'tokenblocklist', 'users', ['user_id'], ['id'])
+    op.drop_constraint('tokenblocklist_organization_id_fkey', 'tokenblocklist', type_='foreignkey')
+    op.drop_column('tokenblocklist', 'organization_id')
+
+    op.drop_index('ix_leaverequests_organization_status_created', table_name='leaverequests')
+    op.drop_constraint('uq_leavetypes_organization_name', 'leavetypes', type_='unique')
+    op.drop_index('ix_users_organization_role', table_name='users')
+
+    for table in TENANT_TABLES:
+        op.drop_constraint(f'{table}_organization_id_fkey', table, type_='foreignkey')
+        op.drop_column(table, 'organization_id')
+
+    op.drop_table('organizations')
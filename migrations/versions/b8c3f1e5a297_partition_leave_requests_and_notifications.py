@@ -0,0 +1,210 @@
+"""partition leave requests and notifications
+
+Revision ID: b8c3f1e5a297
+Revises: e6d2a7b4f810
+Create Date: 2026-10-19 13:40:12.684390
+
+Rebuilds leaverequests (yearly) and notifications (monthly) as tables
+range-partitioned on created_at. Existing rows are copied into partitions
+covering their creation dates, a DEFAULT partition catches anything outside
+the pre-created ranges, and the id sequences are carried over. Run
+`flask partitions maintain` regularly to create upcoming partitions.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b8c3f1e5a297'
+down_revision = 'e6d2a7b4f810'
+branch_labels = None
+depends_on = None
+
+
+LEAVE_REQUEST_COLUMNS = (
+    'id, user_id, leave_type_id, start_date, end_date, status, reason, '
+    'created_at, updated_at, claimed_by, claimed_until'
+)
+NOTIFICATION_COLUMNS = 'id, user_id, message, is_read, created_at'
+
+
+def _create_leave_request_indexes():
+    op.execute(
+        "CREATE INDEX ix_leaverequests_reason_tsv ON leaverequests "
+        "USING gin (to_tsvector('english', coalesce(reason, '')))"
+    )
+    op.execute(
+        "CREATE INDEX ix_leaverequests_date_range ON leaverequests "
+        "USING gist (daterange(start_date, end_date, '[]'))"
+    )
+    op.execute('CREATE INDEX ix_leaverequests_status_type_start ON leaverequests (status, leave_type_id, start_date)')
+    op.execute("CREATE INDEX ix_leaverequests_pending_queue ON leaverequests (created_at, id) WHERE status = 'pending'")
+    op.execute('CREATE INDEX ix_leaverequests_user_id ON leaverequests (user_id)')
+
+
+def _drop_leave_request_indexes():
+    for name in ('ix_leaverequests_reason_tsv', 'ix_leaverequests_date_range',
+                 'ix_leaverequests_status_type_start', 'ix_leaverequests_pending_queue',
+                 'ix_leaverequests_user_id'):
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def upgrade():
+    # Foreign keys cannot point at id alone once it stops being the primary key
+    with op.batch_alter_table('leaveledger', schema=None) as batch_op:
+        batch_op.drop_constraint('leaveledger_leave_request_id_fkey', type_='foreignkey')
+
+    # --- leaverequests: yearly partitions ---
+    _drop_leave_request_indexes()
+    op.execute('ALTER TABLE leaverequests RENAME TO leaverequests_unpartitioned')
+    op.execute('ALTER TABLE leaverequests_unpartitioned RENAME CONSTRAINT leaverequests_pkey TO leaverequests_unpartitioned_pkey')
+    op.execute("""
+        CREATE TABLE leaverequests (
+            id BIGINT NOT NULL DEFAULT nextval('leaverequests_id_seq'),
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            leave_type_id BIGINT NOT NULL REFERENCES leavetypes (id),
+            start_date DATE NOT NULL,
+            end_date DATE NOT NULL,
+            status VARCHAR NOT NULL,
+            reason VARCHAR,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            updated_at TIMESTAMP WITH TIME ZONE,
+            claimed_by BIGINT REFERENCES users (id),
+            claimed_until TIMESTAMP WITH TIME ZONE,
+            CONSTRAINT leaverequests_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('ALTER SEQUENCE leaverequests_id_seq OWNED BY leaverequests.id')
+    op.execute("""
+        DO $$
+        DECLARE
+            first_year int;
+            y int;
+        BEGIN
+            SELECT coalesce(min(extract(year FROM created_at AT TIME ZONE 'UTC'))::int,
+                            extract(year FROM now() AT TIME ZONE 'UTC')::int)
+              INTO first_year
+              FROM leaverequests_unpartitioned;
+            FOR y IN first_year .. extract(year FROM now() AT TIME ZONE 'UTC')::int + 1 LOOP
+                EXECUTE format(
+                    'CREATE TABLE leaverequests_y%s PARTITION OF leaverequests FOR VALUES FROM (%L) TO (%L)',
+                    y, make_timestamptz(y, 1, 1, 0, 0, 0, 'UTC'), make_timestamptz(y + 1, 1, 1, 0, 0, 0, 'UTC')
+                );
+            END LOOP;
+        END $$
+    """)
+    op.execute('CREATE TABLE leaverequests_default PARTITION OF leaverequests DEFAULT')
+    op.execute(
+        f'INSERT INTO leaverequests ({LEAVE_REQUEST_COLUMNS}) '
+        f'SELECT {LEAVE_REQUEST_COLUMNS} FROM leaverequests_unpartitioned'
+    )
+    op.execute('DROP TABLE leaverequests_unpartitioned')
+    _create_leave_request_indexes()
+
+    # --- notifications: monthly partitions ---
+    op.execute('ALTER TABLE notifications RENAME TO notifications_unpartitioned')
+    op.execute('ALTER TABLE notifications_unpartitioned RENAME CONSTRAINT notifications_pkey TO notifications_unpartitioned_pkey')
+    op.execute("""
+        CREATE TABLE notifications (
+            id BIGINT NOT NULL DEFAULT nextval('notifications_id_seq'),
+            user_id BIGINT NOT NULL REFERENCES users (id),
+            message VARCHAR NOT NULL,
+            is_read BOOLEAN NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL,
+            CONSTRAINT notifications_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    op.execute('ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id')
+    op.execute("""
+        DO $$
+        DECLARE
+            first_month timestamptz;
+            m timestamptz;
+        BEGIN
+            SELECT coalesce(date_trunc('month', min(created_at) AT TIME ZONE 'UTC'),
+                            date_trunc('month', now() AT TIME ZONE 'UTC')) AT TIME ZONE 'UTC'
+              INTO first_month
+              FROM notifications_unpartitioned;
+            FOR m IN SELECT generate_series(
+                first_month,
+                date_trunc('month', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' + interval '3 months',
+                interval '1 month'
+            ) LOOP
+                EXECUTE format(
+                    'CREATE TABLE notifications_y%s PARTITION OF notifications FOR VALUES FROM (%L) TO (%L)',
+                    to_char(m AT TIME ZONE 'UTC', 'YYYY"m"MM'), m, m + interval '1 month'
+                );
+            END LOOP;
+        END $$
+    """)
+    op.execute('CREATE TABLE notifications_default PARTITION OF notifications DEFAULT')
+    op.execute(
+        f'INSERT INTO notifications ({NOTIFICATION_COLUMNS}) '
+        f'SELECT {NOTIFICATION_COLUMNS} FROM notifications_unpartitioned'
+    )
+    op.execute('DROP TABLE notifications_unpartitioned')
+    op.execute('CREATE INDEX ix_notifications_user_unread ON notifications (user_id) WHERE NOT is_read')
+
+
+def downgrade():
+    # --- notifications back to a plain table ---
+    op.execute('DROP INDEX IF EXISTS ix_notifications_user_unread')
+    op.execute('ALTER TABLE notifications RENAME TO notifications_partitioned')
+    op.execute('ALTER TABLE notifications_partitioned RENAME CONSTRAINT notifications_pkey TO notifications_partitioned_pkey')
+    op.create_table('notifications',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('notifications_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('message', sa.String(), nullable=False),
+    sa.Column('is_read', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id')
+    op.execute(
+        f'INSERT INTO notifications ({NOTIFICATION_COLUMNS}) '
+        f'SELECT {NOTIFICATION_COLUMNS} FROM notifications_partitioned'
+    )
+    op.execute('DROP TABLE notifications_partitioned CASCADE')
+
+    # --- leaverequests back to a plain table ---
+    _drop_leave_request_indexes()
+    op.execute('ALTER TABLE leaverequests RENAME TO leaverequests_partitioned')
+    op.execute('ALTER TABLE leaverequests_partitioned RENAME CONSTRAINT leaverequests_pkey TO leaverequests_partitioned_pkey')
+    op.create_table('leaverequests',
+    sa.Column('id', sa.BigInteger(), server_default=sa.text("nextval('leaverequests_id_seq')"), nullable=False),
+    sa.Column('user_id', sa.BigInteger(), nullable=False),
+    sa.Column('leave_type_id', sa.BigInteger(), nullable=False),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('reason', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('claimed_by', sa.BigInteger(), nullable=True),
+    sa.Column('claimed_until', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['claimed_by'], ['users.id'], name='leaverequests_claimed_by_fkey'),
+    sa.ForeignKeyConstraint(['leave_type_id'], ['leavetypes.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('ALTER SEQUENCE leaverequests_id_seq OWNED BY leaverequests.id')
+    op.execute(
+        f'INSERT INTO leaverequests ({LEAVE_REQUEST_COLUMNS}) '
+        f'SELECT {LEAVE_REQUEST_COLUMNS} FROM leaverequests_partitioned'
+    )
+    op.execute('DROP TABLE leaverequests_partitioned CASCADE')
+    op.execute(
+        "CREATE INDEX ix_leaverequests_reason_tsv ON leaverequests "
+        "USING gin (to_tsvector('english', coalesce(reason, '')))"
+    )
+    op.execute(
+        "CREATE INDEX ix_leaverequests_date_range ON leaverequests "
+        "USING gist (daterange(start_date, end_date, '[]'))"
+    )
+    op.execute('CREATE INDEX ix_leaverequests_status_type_start ON leaverequests (status, leave_type_id, start_date)')
+    op.execute("CREATE INDEX ix_leaverequests_pending_queue ON leaverequests (created_at, id) WHERE status = 'pending'")
+
+    with op.batch_alter_table('leaveledger', schema=None) as batch_op:
+        batch_op.create_foreign_key('leaveledger_leave_request_id_fkey', 'leaverequests', ['leave_request_id'], ['id'])
@@ -0,0 +1,43 @@
+"""add leave request search indexes
+
+Revision ID: c41d8e7f2a93
+Revises: 7b2e4d9a0c15
+Create Date: 2026-10-19 10:48:55.310276
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d8e7f2a93'
+down_revision = '7b2e4d9a0c15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        "CREATE INDEX ix_leaverequests_reason_tsv ON leaverequests "
+        "USING gin (to_tsvector('english', coalesce(reason, '')))"
+    )
+    op.execute(
+        "CREATE INDEX ix_leaverequests_date_range ON leaverequests "
+        "USING gist (daterange(start_date, end_date, '[]'))"
+    )
+    with op.batch_alter_table('leaverequests', schema=None) as batch_op:
+        batch_op.create_index('ix_leaverequests_status_type_start', ['status', 'leave_type_id', 'start_date'], unique=False)
+
+    op.execute(
+        "CREATE INDEX ix_users_username_lower_pattern ON users "
+        "(lower(username) text_pattern_ops)"
+    )
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS ix_users_username_lower_pattern')
+    with op.batch_alter_table('leaverequests', schema=None) as batch_op:
+        batch_op.drop_index('ix_leaverequests_status_type_start')
+
+    op.execute('DROP INDEX IF EXISTS ix_leaverequests_date_range')
+    op.execute('DROP INDEX IF EXISTS ix_leaverequests_reason_tsv')
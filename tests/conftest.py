@@ -0,0 +1,120 @@
+# tests/conftest.py
+"""Fixtures for tests that run against a real PostgreSQL database.
+
+TEST_DATABASE_URL (see TestingConfig) must point at a database the tests
+may wipe; it is migrated to head once per session. Tests are skipped when
+it cannot be reached.
+"""
+import os
+from datetime import date, datetime
+import pytest
+from flask_jwt_extended import create_access_token
+from flask_migrate import upgrade
+from sqlalchemy.exc import OperationalError
+from app import create_app, db
+from app.models.models import Organization, User, LeaveType, LeaveRequest, LeaveLedgerEntry, Notification
+from config import TestingConfig
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# Everything except organizations (seeded by the migrations) and alembic_version
+TABLES = (
+    'users', 'leavetypes', 'leaverequests', 'leaveledger', 'leavebalances', 'notifications',
+    'notificationpreferences', 'employeesummaries', 'idempotencykeys', 'tokenblocklist',
+    'tombstones', 'emailoutbox', 'leaveblackouts', 'leavecapacitylimits', 'leavedaycounts',
+)
+
+
+@pytest.fixture(scope='session')
+def app():
+    app = create_app(TestingConfig)
+    with app.app_context():
+        try:
+            db.session.execute(db.text('SELECT 1'))
+        except OperationalError:
+            pytest.skip('TEST_DATABASE_URL is not reachable')
+        db.session.remove()
+        upgrade(directory=MIGRATIONS)
+    yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _truncate():
+    db.session.execute(db.text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+
+
+def _bearer(user):
+    return {'Authorization': 'Bearer ' + create_access_token(
+        identity=str(user.id), additional_claims={'org': user.organization_id}
+    )}
+
+
+@pytest.fixture
+def seeded(app):
+    """An admin and an employee with leave types, balances, requests and notifications."""
+    with app.app_context():
+        _truncate()
+
+        admin = User(username='admin', email='admin@example.com', role='admin', is_approved=True)
+        employee = User(username='employee', email='employee@example.com', role='employee', is_approved=True)
+        pending = User(username='pending', email='pending@example.com', role='employee')
+        for user in (admin, employee, pending):
+            user.set_password('password')
+        annual = LeaveType(name='Annual Leave', default_allocation=20, requires_balance=True)
+        unpaid = LeaveType(name='Unpaid Leave', requires_balance=False)
+        db.session.add_all([admin, employee, pending, annual, unpaid])
+        db.session.flush()
+
+        db.session.add(LeaveLedgerEntry(user_id=employee.id, leave_type_id=annual.id, kind='accrual', delta=20))
+        for month in (3, 4, 5):
+            db.session.add(LeaveRequest(
+                user_id=employee.id, leave_type_id=annual.id, status='pending', reason='Holiday',
+                start_date=date(2030, month, 1), end_date=date(2030, month, 3)
+            ))
+        db.session.add(Notification(user_id=employee.id, message='Welcome', created_at=datetime.utcnow()))
+        db.session.commit()
+
+        tokens = {user.username: _bearer(user) for user in (admin, employee)}
+        db.session.remove()
+    # Outside the app context, so every request gets its own g and session
+    return tokens
+
+
+@pytest.fixture
+def two_organizations(app):
+    """Two organizations in the default database, each with an admin, an employee
+    and a balance-tracked leave type. Returns ids and tokens keyed by slug."""
+    with app.app_context():
+        _truncate()
+        organizations = {}
+        for slug in ('default', 'other'):
+            organization = Organization.query.filter_by(slug=slug).first()
+            if organization is None:
+                organization = Organization(name=slug.title(), slug=slug)
+                db.session.add(organization)
+                db.session.flush()
+
+            admin = User(username='admin', email='admin@example.com', role='admin',
+                         is_approved=True, organization_id=organization.id)
+            employee = User(username='employee', email='employee@example.com', role='employee',
+                            is_approved=True, organization_id=organization.id)
+            for user in (admin, employee):
+                user.set_password('password')
+            leave_type = LeaveType(name='Annual Leave', default_allocation=20, requires_balance=True,
+                                   organization_id=organization.id)
+            db.session.add_all([admin, employee, leave_type])
+            db.session.flush()
+            organizations[slug] = {
+                'id': organization.id,
+                'admin': admin.id,
+                'employee': employee.id,
+                'leave_type': leave_type.id,
+                'tokens': {'admin': _bearer(admin), 'employee': _bearer(employee)},
+            }
+        db.session.commit()
+        db.session.remove()
+    return organizations
@@ -0,0 +1,34 @@
+# tests/test_health.py
+"""/readyz answers within its deadline even when a database hangs."""
+import threading
+import time
+from app.utils import health
+
+
+def test_readyz_gives_up_on_a_hung_database(app, client, monkeypatch):
+    release = threading.Event()
+    calls = []
+
+    def hung_check(engine, timeout_ms, with_backlog):
+        # Like a connect to an unreachable host: no statement_timeout applies
+        calls.append(engine)
+        release.wait(5)
+        return {'ok': True, 'pool': {}}
+
+    monkeypatch.setattr(health, '_check_database', hung_check)
+    monkeypatch.setitem(app.config, 'HEALTH_DB_TIMEOUT_MS', 200)
+    monkeypatch.setitem(app.config, 'HEALTH_CACHE_SECONDS', 0)
+    health.health_cache.invalidate()
+    try:
+        for _ in range(2):
+            started = time.monotonic()
+            response = client.get('/readyz')
+
+            assert response.status_code == 503
+            assert time.monotonic() - started < 1
+            assert 'No answer within 200 ms' in response.get_json()['databases']['default']['error']
+        # The second probe waited on the same hung check instead of starting another
+        assert len(calls) == 1
+    finally:
+        release.set()
+        health.health_cache.invalidate()
@@ -0,0 +1,31 @@
+# tests/test_idempotency.py
+"""A repeated Idempotency-Key replays the first response instead of redoing the work."""
+from app import db
+from app.models.models import LeaveRequest
+
+
+def _submit(client, organization, key, end_date='2030-06-02'):
+    return client.post('/employee/leave-requests', headers={
+        **organization['tokens']['employee'], 'Idempotency-Key': key
+    }, json={'leave_type_id': organization['leave_type'], 'start_date': '2030-06-01', 'end_date': end_date})
+
+
+def test_repeated_key_replays_the_response(app, client, two_organizations):
+    organization = two_organizations['default']
+    client.post('/admin/leave-balance/set', headers=organization['tokens']['admin'], json={
+        'user_id': organization['employee'], 'leave_type_id': organization['leave_type'], 'balance': 10
+    })
+
+    first = _submit(client, organization, 'retry-1')
+    replayed = _submit(client, organization, 'retry-1')
+
+    assert first.status_code == replayed.status_code == 201
+    assert replayed.get_json() == first.get_json()
+    assert replayed.headers['Idempotent-Replayed'] == 'true'
+    assert 'Idempotent-Replayed' not in first.headers
+    with app.app_context():
+        assert db.session.query(LeaveRequest).count() == 1
+
+    # The key is bound to the request it was first used for
+    assert _submit(client, organization, 'retry-1', end_date='2030-06-03').status_code == 422
+    assert _submit(client, organization, 'retry-2').status_code == 201
@@ -0,0 +1,82 @@
+# tests/test_ledger.py
+"""Concurrent approvals never spend more than the balance or the team capacity."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.models import LeaveType, User
+from app.utils.ledger import get_balance
+
+
+def _approve_concurrently(app, headers, request_ids):
+    """PUT an approval for every request at once; returns the status codes."""
+    barrier = threading.Barrier(len(request_ids))
+
+    def approve(request_id):
+        client = app.test_client()
+        barrier.wait()
+        return client.put(f'/admin/leave-requests/{request_id}', headers=headers,
+                          json={'status': 'approved'}).status_code
+
+    with ThreadPoolExecutor(len(request_ids)) as pool:
+        return sorted(pool.map(approve, request_ids))
+
+
+def _request_leave(client, headers, leave_type_id, start_date, end_date):
+    response = client.post('/employee/leave-requests', headers=headers, json={
+        'leave_type_id': leave_type_id, 'start_date': start_date, 'end_date': end_date
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()['leave_request']['id']
+
+
+def test_concurrent_approvals_cannot_overdraw_the_balance(app, client, two_organizations):
+    organization = two_organizations['default']
+    client.post('/admin/leave-balance/set', headers=organization['tokens']['admin'], json={
+        'user_id': organization['employee'], 'leave_type_id': organization['leave_type'], 'balance': 10
+    })
+    # Four requests of four days each; any one of them fits the balance on its own
+    request_ids = [
+        _request_leave(client, organization['tokens']['employee'], organization['leave_type'],
+                       f'2030-0{month}-01', f'2030-0{month}-04')
+        for month in (3, 4, 5, 6)
+    ]
+
+    statuses = _approve_concurrently(app, organization['tokens']['admin'], request_ids)
+
+    assert statuses == [200, 200, 400, 400]
+    with app.app_context():
+        assert get_balance(organization['employee'], organization['leave_type']) == 2
+
+
+def test_concurrent_approvals_cannot_exceed_a_capacity_limit(app, client, two_organizations):
+    organization = two_organizations['default']
+    with app.app_context():
+        unpaid = LeaveType(name='Unpaid Leave', requires_balance=False, organization_id=organization['id'])
+        colleagues = [
+            User(username=f'colleague{n}', email=f'colleague{n}@example.com', role='employee',
+                 is_approved=True, organization_id=organization['id'])
+            for n in range(3)
+        ]
+        for colleague in colleagues:
+            colleague.set_password('password')
+        db.session.add_all([unpaid, *colleagues])
+        db.session.commit()
+        unpaid_id = unpaid.id
+        tokens = [{'Authorization': 'Bearer ' + create_access_token(
+            identity=str(colleague.id), additional_claims={'org': colleague.organization_id}
+        )} for colleague in colleagues]
+        db.session.remove()
+    headers = organization['tokens']['admin']
+    response = client.post('/admin/capacity-limits', headers=headers,
+                           json={'max_absent': 2, 'leave_type_id': None})
+    assert response.status_code == 201, response.get_json()
+    # All three are off on 3 and 4 July; each passes the check at submission
+    request_ids = [
+        _request_leave(client, token, unpaid_id, f'2030-07-0{n + 1}', f'2030-07-0{n + 4}')
+        for n, token in enumerate(tokens)
+    ]
+
+    statuses = _approve_concurrently(app, headers, request_ids)
+
+    assert statuses == [200, 200, 409]
@@ -0,0 +1,43 @@
+# tests/test_projection.py
+"""The employee summary follows committed changes, refreshed after the commit."""
+from app import db
+from app.models.models import EmployeeSummary
+
+
+def _summary(app, user_id):
+    with app.app_context():
+        summary = db.session.get(EmployeeSummary, user_id)
+        return summary.to_dict() if summary else None
+
+
+def test_summary_refreshed_after_commit(app, client, two_organizations):
+    organization = two_organizations['default']
+    headers = organization['tokens']['employee']
+    assert client.get('/employee/summary', headers=headers).get_json()['pending_count'] == 0
+    client.post('/admin/leave-balance/set', headers=organization['tokens']['admin'], json={
+        'user_id': organization['employee'], 'leave_type_id': organization['leave_type'], 'balance': 10
+    })
+    assert _summary(app, organization['employee'])['balances'][0]['balance'] == 10
+
+    response = client.post('/employee/leave-requests', headers=headers, json={
+        'leave_type_id': organization['leave_type'], 'start_date': '2030-06-01', 'end_date': '2030-06-02'
+    })
+
+    assert response.status_code == 201, response.get_json()
+    summary = _summary(app, organization['employee'])
+    assert summary['pending_count'] == 1
+    assert summary['balances'][0]['balance'] == 10
+
+
+def test_rolled_back_changes_do_not_refresh(app, client, two_organizations):
+    organization = two_organizations['default']
+    headers = organization['tokens']['employee']
+    client.get('/employee/summary', headers=headers)
+
+    # Unknown leave type: the view rolls back after flushing nothing useful
+    response = client.post('/employee/leave-requests', headers=headers, json={
+        'leave_type_id': 999999, 'start_date': '2030-06-01', 'end_date': '2030-06-02'
+    })
+
+    assert response.status_code in (400, 404, 500)
+    assert _summary(app, organization['employee'])['pending_count'] == 0
@@ -0,0 +1,48 @@
+# tests/test_query_budget.py
+"""Every endpoint with @query_budget stays within it under TestingConfig ('raise' mode)."""
+import pytest
+from app.utils.query_budget import QueryBudgetExceeded
+
+BUDGETED = [
+    ('employee', '/employee/leave-requests'),
+    ('employee', '/employee/leave-requests?status=pending'),
+    ('employee', '/employee/leave-balance'),
+    ('employee', '/employee/notifications'),
+    ('employee', '/employee/summary'),
+    ('admin', '/admin/users/pending'),
+    ('admin', '/admin/users'),
+    ('admin', '/admin/leave-balance/forecast'),
+    ('admin', '/admin/leave-requests'),
+    ('admin', '/admin/leave-requests/search?q=holiday'),
+    ('admin', '/admin/dashboard/summary'),
+]
+
+
+@pytest.mark.parametrize('role,path', BUDGETED)
+def test_endpoint_within_budget(app, client, seeded, role, path):
+    response = client.get(path, headers=seeded[role])
+
+    assert response.status_code == 200, response.get_json()
+    endpoint = app.url_map.bind('localhost').match(path.split('?')[0])[0]
+    budget = app.view_functions[endpoint].query_budget
+    assert int(response.headers['X-Query-Count']) <= budget
+
+
+def test_budgets_are_declared_on_the_registered_view(app):
+    # _check_budget reads the attribute from the registered view function
+    budgeted = {endpoint for endpoint, view in app.view_functions.items() if hasattr(view, 'query_budget')}
+    assert {'employee.get_my_leave_requests', 'admin.get_all_users', 'admin.dashboard_summary'} <= budgeted
+
+
+def test_exceeding_the_budget_raises(app, client, seeded, monkeypatch):
+    monkeypatch.setattr(app.view_functions['admin.get_all_users'], 'query_budget', 1)
+
+    with pytest.raises(QueryBudgetExceeded):
+        client.get('/admin/users', headers=seeded['admin'])
+
+
+def test_unbudgeted_endpoints_use_the_default(app, client, seeded):
+    response = client.get('/admin/leave-types', headers=seeded['admin'])
+
+    assert response.status_code == 200
+    assert int(response.headers['X-Query-Count']) <= app.config['QUERY_BUDGET_DEFAULT']
@@ -0,0 +1,31 @@
+# tests/test_sync.py
+"""Delta sync (?since=) reports deleted leave requests to their owner and organization only."""
+from app import db
+from app.models.models import LeaveRequest
+
+
+def test_deleted_leave_request_is_reported_as_tombstone(app, client, two_organizations):
+    default, other = two_organizations['default'], two_organizations['other']
+    client.post('/admin/leave-balance/set', headers=default['tokens']['admin'], json={
+        'user_id': default['employee'], 'leave_type_id': default['leave_type'], 'balance': 10
+    })
+    created = client.post('/employee/leave-requests', headers=default['tokens']['employee'], json={
+        'leave_type_id': default['leave_type'], 'start_date': '2030-06-01', 'end_date': '2030-06-02'
+    })
+    assert created.status_code == 201, created.get_json()
+    request_id = created.get_json()['leave_request']['id']
+    cursor = client.get('/employee/leave-requests', headers=default['tokens']['employee']).headers['X-Sync-Cursor']
+
+    with app.app_context():
+        db.session.delete(db.session.get(LeaveRequest, request_id))
+        db.session.commit()
+
+    def deleted(path, headers):
+        response = client.get(path, headers=headers, query_string={'since': cursor})
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()['deleted']
+
+    assert deleted('/employee/leave-requests', default['tokens']['employee']) == [request_id]
+    assert deleted('/admin/leave-requests', default['tokens']['admin']) == [request_id]
+    assert deleted('/employee/leave-requests', other['tokens']['employee']) == []
+    assert deleted('/admin/leave-requests', other['tokens']['admin']) == []
@@ -0,0 +1,73 @@
+# tests/test_tenancy.py
+"""Data of one organization never leaks into another's."""
+from app import db
+from app.models.models import LeaveLedgerEntry, LeaveRequest
+from app.utils.ledger import accrue_default_allocations
+
+
+def test_accrual_only_credits_own_organization_leave_types(app, two_organizations):
+    # Run the way `flask ledger accrue` does: no request, so no tenant is set
+    with app.app_context():
+        created = accrue_default_allocations(note='yearly')
+        entries = db.session.query(LeaveLedgerEntry.user_id, LeaveLedgerEntry.leave_type_id).all()
+
+    assert created == 2
+    assert sorted(entries) == sorted(
+        (organization['employee'], organization['leave_type'])
+        for organization in two_organizations.values()
+    )
+
+
+def test_unknown_slug_lookups_are_cached_and_rate_limited(app, client, two_organizations, monkeypatch):
+    monkeypatch.setitem(app.config, 'RATE_LIMIT_ENABLED', True)
+    monkeypatch.setitem(app.config['RATE_LIMITS'], 'tenant_lookup', {'ip': '3/minute'})
+    environ = {'REMOTE_ADDR': '203.0.113.7'}
+
+    def login(slug, environ=environ):
+        return client.post('/auth/login', json={'username': 'employee', 'password': 'password'},
+                           headers={'X-Organization': slug}, environ_base=environ)
+
+    # The same unknown slug is looked up once and then answered from the cache
+    assert [login('missing').status_code for _ in range(5)] == [404] * 5
+    # Every fresh slug is charged to the client's bucket before the lookup
+    assert [login(f'random-{n}').status_code for n in range(3)] == [404, 404, 429]
+    # Another client is unaffected, and a known slug resolves to its organization
+    response = login('other', environ={'REMOTE_ADDR': '203.0.113.8'})
+    assert response.status_code == 200, response.get_json()
+    assert response.get_json()['user']['id'] == two_organizations['other']['employee']
+
+
+def test_revoke_tokens_is_404_for_unknown_and_other_organization_users(client, two_organizations):
+    default, other = two_organizations['default'], two_organizations['other']
+    headers = default['tokens']['admin']
+
+    for user_id in (other['employee'], 999999):
+        response = client.post(f'/admin/users/{user_id}/revoke-tokens', headers=headers)
+        assert response.status_code == 404, response.get_json()
+        assert response.get_json() == {'error': 'User not found'}
+
+    response = client.post(f"/admin/users/{default['employee']}/revoke-tokens", headers=headers)
+    assert response.status_code == 200, response.get_json()
+
+
+def test_admin_cannot_reach_another_organizations_records(app, client, two_organizations):
+    default, other = two_organizations['default'], two_organizations['other']
+    client.post('/admin/leave-balance/set', headers=other['tokens']['admin'], json={
+        'user_id': other['employee'], 'leave_type_id': other['leave_type'], 'balance': 10
+    })
+    created = client.post('/employee/leave-requests', headers=other['tokens']['employee'], json={
+        'leave_type_id': other['leave_type'], 'start_date': '2030-06-01', 'end_date': '2030-06-01'
+    })
+    assert created.status_code == 201, created.get_json()
+    request_id = created.get_json()['leave_request']['id']
+    headers = default['tokens']['admin']
+
+    users = client.get('/admin/users', headers=headers).get_json()
+    assert other['employee'] not in [user['id'] for user in users]
+    assert client.get('/admin/leave-requests', headers=headers).get_json() == []
+    assert client.get(f"/admin/users/{other['employee']}/ledger", headers=headers).status_code == 404
+
+    response = client.put(f'/admin/leave-requests/{request_id}', headers=headers, json={'status': 'approved'})
+    assert response.status_code == 404, response.get_json()
+    with app.app_context():
+        assert db.session.get(LeaveRequest, request_id).status == 'pending'